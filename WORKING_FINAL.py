@@ -1,5 +1,4 @@
 from base_player import BasePlayer
-from hexgame import HexBoard
 import numpy as np
 import time
 
@@ -35,24 +34,23 @@ class MinMaxPlayer(BasePlayer):
 
     def find_best_move(self, board, time_limit_seconds):
         start_time = time.time()
-        eval, best_move = self.minimax(board, DEPTH)
+        # The whole search makes and takes back moves on one copy of the game board
+        eval, best_move = self.minimax(board.copy(), DEPTH)
         
         return best_move
 
     def minimax(self, board, depth, alpha=float('-inf'), beta=float('inf'), maximizing_player=True):
-        hex_game = HexGameForAI(board)
+        if depth == 0 or board.winner() != 0:
+            return self.evaluate(board), None
 
-        if depth == 0 or hex_game.check_finish() != 0:
-            return self.evaluate(hex_game.board), None
-
-        legal_moves = self.get_legal_moves(hex_game.board)
+        legal_moves = self.get_legal_moves(board)
         if maximizing_player:
             max_eval = float('-inf')
             best_move = None
             for move in legal_moves:
-                new_board = HexBoard(hex_game.board.board)
-                new_board.set_tile(*move, 1)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, False)
+                board.play(move, 1)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, False)
+                board.undo()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
@@ -64,9 +62,9 @@ class MinMaxPlayer(BasePlayer):
             min_eval = float('inf')
             best_move = None
             for move in legal_moves:
-                new_board = HexBoard(hex_game.board.board)
-                new_board.set_tile(*move, 2)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, True)
+                board.play(move, 2)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, True)
+                board.undo()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
@@ -77,8 +75,7 @@ class MinMaxPlayer(BasePlayer):
             return min_eval, best_move
 
     def get_legal_moves(self, board):
-        valid_moves = [(i, j) for i in range(board.dim()[1]) for j in range(board.dim()[0]) if board.get_tile(i, j) == 0]
-        return valid_moves
+        return board.legal_moves()
 
     def evaluate(self, board):
         hash_val = self.calculate_hash(board)
@@ -155,41 +152,8 @@ class MinMaxPlayer(BasePlayer):
        
 class HexGameForAI:
     def __init__(self, board):
-        self.board = HexBoard(board.board)
-        
+        self.board = board
+
     def check_finish(self) -> int:
-        # We build a "visited" matrix for both players, similar to bfs/dfs
-        visited = np.zeros(self.board.dim(), dtype=int)
-
-        # Check player 1 (red, top)
-        pl_id = 1
-        for j in range(visited.shape[1]):
-            if self.board.get_tile(0, j) == pl_id:
-                visited[0, j] = pl_id
-                visited = self.__visit(0, j, pl_id, visited)
-
-        if np.any(visited[-1, :] == pl_id):
-            return pl_id
-
-        # Check player 2 (blue, left)
-        pl_id = 2
-        for i in range(visited.shape[0]):
-            if self.board.get_tile(i, 0) == pl_id:
-                visited[i, 0] = pl_id
-                self.__visit (i, 0, pl_id, visited)
-
-        if np.any(visited[:, -1] == pl_id):
-            return pl_id
-
-        return 0  # game goes on
-    
-    def __visit(self, i, j, player, visited) -> np.ndarray:
-        x_dim, y_dim = self.board.dim()
-        candidates = [(i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j + 1), (i + 1, j), (i + 1, j - 1)]
-        neighbors = [(i, j) for (i, j) in candidates if 0 <= i < y_dim and 0 <= j < x_dim]
-
-        for (k, l) in neighbors:
-            if self.board.get_tile(k, l) == player and not visited[k, l]:
-                visited[k, l] = player
-                visited = self.__visit(k, l, player, visited)
-        return visited
+        # The board keeps its connectivity up to date (see HexBoard.winner), no search needed
+        return self.board.winner()
@@ -1,4 +1,5 @@
 from base_player import BasePlayer
+from batch_evaluation import neighbor_count
 import numpy as np
 
 class AIPlayer(BasePlayer):
@@ -36,51 +37,44 @@ class AIPlayer(BasePlayer):
             Indices of the resulting tile.
 
         """
-        valid_moves = [(i, j) for i in range(board.dim()[1]) for j in range(board.dim()[0]) if board.get_tile(i, j) == 0]
-        scores = []
+        # Select the move with the highest score (first one in row-major order on ties)
+        scores = self.score_map(board)
+        i, j = np.unravel_index(np.argmax(scores), scores.shape)
+        return int(i), int(j)
 
-        for move in valid_moves:
-            score = self.evaluate_move(board, move)
-            scores.append((move, score))
-
-        # Sort moves by their scores in descending order
-        sorted_moves = sorted(scores, key=lambda x: x[1], reverse=True)
-    
-        # Select the move with the highest score
-        chosen_move = sorted_moves[0][0]
-        
-        return chosen_move
-
-    def evaluate_move(self, board, move) -> float:
+    def score_map(self, board) -> np.ndarray:
         """
-        Evaluates a move using an improved heuristic.
+        Scores all moves at once using an improved heuristic.
+
+        The distance and neighbor maps are computed once for the whole
+        board, so a turn costs a few array operations instead of one board
+        scan per empty tile.
 
         Parameters
         ----------
         board : HexBoard
             Current state of the Hex board.
-        move : tuple (int, int)
-            Indices of the move to evaluate.
 
         Returns
         -------
-        value : float
-            Score of the move.
+        scores : numpy array
+            Score of every tile (same shape as the board), -inf for occupied tiles.
 
         """
+        tiles = np.asarray(board.board)
         opponent_id = 3 - self.id  # Assuming player ids are 1 and 2
 
-        # Calculate the distance to the closest opponent tile
-        min_distance_to_opponent = self.min_distance_to_opponent(board, move, opponent_id)
+        # Distance of each tile to the closest opponent tile
+        min_distance_to_opponent = self.opponent_distance_map(board, opponent_id)
 
-        # Calculate the distance to the center of the board
-        distance_to_center = self.distance_to_center(board, move)
+        # Distance of each tile to the center of the board
+        distance_to_center = self.center_distance_map(board)
 
-        # Calculate the number of neighboring tiles controlled by the AI player
-        ai_controlled_neighbors = self.count_ai_controlled_neighbors(board, move)
+        # Number of neighboring tiles controlled by the AI player
+        ai_controlled_neighbors = self.ai_controlled_neighbor_map(board)
 
         # Introduce some randomness to avoid purely horizontal and vertical moves
-        randomness = np.random.uniform(0.8, 1.2)
+        randomness = np.random.uniform(0.8, 1.2, size=tiles.shape)
 
         # Combine these factors to get a score
         score = (
@@ -88,68 +82,91 @@ class AIPlayer(BasePlayer):
             0.2 / (1 + distance_to_center) * randomness +
             0.5 * ai_controlled_neighbors
         )
-        
-        return score
-
-    def min_distance_to_opponent(self, board, move, opponent_id) -> float:
-        distances = []
-
-        for i in range(board.dim()[1]):
-            for j in range(board.dim()[0]):
-                if board.get_tile(i, j) == opponent_id:
-                    distance = np.sqrt((i - move[0]) ** 2 + (j - move[1]) ** 2)
-                    distances.append(distance)
 
-        if distances:
-            return min(distances)
-        else:
-            return float('inf')
+        return np.where(tiles == 0, score, -np.inf)
 
-    def distance_to_center(self, board, move) -> float:
+    def evaluate_move(self, board, move) -> float:
         """
-        Calculates the distance from the chosen move to the center of the board.
+        Evaluates a move using an improved heuristic.
 
         Parameters
         ----------
         board : HexBoard
             Current state of the Hex board.
         move : tuple (int, int)
-            Indices of the chosen move.
+            Indices of the move to evaluate.
 
         Returns
         -------
-        distance : float
-            Distance from the move to the center of the board.
+        value : float
+            Score of the move.
 
         """
-        center_row = board.dim()[1] // 2
-        center_col = board.dim()[0] // 2
+        return float(self.score_map(board)[move])
 
-        i, j = move
-        distance = np.sqrt((i - center_row) ** 2 + (j - center_col) ** 2)
+    def opponent_distance_map(self, board, opponent_id) -> np.ndarray:
+        """
+        Calculates the distance from every tile to the closest opponent tile.
 
-        return distance
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board.
+        opponent_id : int
+            Id of the opponent.
+
+        Returns
+        -------
+        distances : numpy array
+            Euclidean distance of each tile (same shape as the board), inf if
+            the opponent has no tiles.
 
-    def count_ai_controlled_neighbors(self, board, move) -> int:
         """
-        Counts the number of neighboring tiles controlled by the AI player.
+        tiles = np.asarray(board.board)
+        rows, cols = np.indices(tiles.shape)
+        opponent_rows, opponent_cols = np.nonzero(tiles == opponent_id)
+        if len(opponent_rows) == 0:
+            return np.full(tiles.shape, np.inf)
+
+        # Distances of all tiles to all opponent tiles, shape (rows, cols, opponent tiles)
+        distances = np.hypot(rows[..., np.newaxis] - opponent_rows, cols[..., np.newaxis] - opponent_cols)
+        return distances.min(axis=-1)
+
+    def center_distance_map(self, board) -> np.ndarray:
+        """
+        Calculates the distance from every tile to the center of the board.
 
         Parameters
         ----------
         board : HexBoard
             Current state of the Hex board.
-        move : tuple (int, int)
-            Indices of the chosen move.
 
         Returns
         -------
-        count : int
-            Number of neighboring tiles controlled by the AI player.
+        distances : numpy array
+            Distance of each tile to the center of the board (same shape as the board).
 
         """
-        i, j = move
-        neighbors = board.get_neighbors(i, j)
+        center_row = board.dim()[1] // 2
+        center_col = board.dim()[0] // 2
 
-        count = sum(board.get_tile(*neighbor) == self.id for neighbor in neighbors)
+        rows, cols = np.indices((board.dim()[1], board.dim()[0]))
+        return np.hypot(rows - center_row, cols - center_col)
 
-        return count
+    def ai_controlled_neighbor_map(self, board) -> np.ndarray:
+        """
+        Counts for every tile the neighboring tiles controlled by the AI player.
+
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board.
+
+        Returns
+        -------
+        counts : numpy array
+            Number of neighboring tiles controlled by the AI player (same shape as the board).
+
+        """
+        own = np.asarray(board.board) == self.id
+        return neighbor_count(own[np.newaxis])[0]
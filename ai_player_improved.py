@@ -1,12 +1,13 @@
 from base_player import BasePlayer
+from board_geometry import get_geometry, iter_bits
 from hexgame import HexGame
-from hexgame import HexBoard
+from collections import deque
 import numpy as np
-import heapq
 import time
 import copy
 
 DEPTH = 3
+INF = float('inf')
 
 class MinMaxPlayer(BasePlayer):
     def __init__(self):
@@ -42,7 +43,8 @@ class MinMaxPlayer(BasePlayer):
 
         # legal_moves = self.get_legal_moves(board)
         # best_move = None
-        eval, best_move = self.minimax(board, DEPTH)
+        # The whole search makes and takes back moves on one copy of the game board
+        eval, best_move = self.minimax(board.copy(), DEPTH)
         # best_eval = float('-inf')
 
         # for move in legal_moves:
@@ -75,19 +77,17 @@ class MinMaxPlayer(BasePlayer):
             
     
     def minimax(self, board, depth, alpha=float('-inf'), beta=float('inf'), maximizing_player=True):
-        hex_game = HexGameForAI(board)
+        if depth == 0 or board.winner() != 0:
+            return self.evaluate(board), None
 
-        if depth == 0 or hex_game.check_finish() != 0:
-            return self.evaluate(hex_game.board), None
-
-        legal_moves = self.get_legal_moves(hex_game.board)
+        legal_moves = self.get_legal_moves(board)
         if maximizing_player:
             max_eval = float('-inf')
             best_move = None
             for move in legal_moves:
-                new_board = HexBoard(hex_game.board.board) 
-                new_board.set_tile(*move, self.id)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, False)
+                board.play(move, self.id)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, False)
+                board.undo()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
@@ -99,10 +99,9 @@ class MinMaxPlayer(BasePlayer):
             min_eval = float('inf')
             best_move = None
             for move in legal_moves:
-                # new_board = HexBoard(board.board) 
-                new_board = HexBoard(hex_game.board.board) 
-                new_board.set_tile(*move, 3 - self.id)  # Assume 3 - self.id is the opponent's id
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, True)
+                board.play(move, 3 - self.id)  # Assume 3 - self.id is the opponent's id
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, True)
+                board.undo()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
@@ -113,19 +112,12 @@ class MinMaxPlayer(BasePlayer):
             return min_eval, best_move
         
     def get_legal_moves(self, board):
-        valid_moves = []
-        valid_moves = [(i, j) for i in range(board.dim()[1]) for j in range(board.dim()[0]) if board.get_tile(i, j) == 0]
-        # print(valid_moves)
-        # print(board)
-        return valid_moves
+        return board.legal_moves()
 
     def evaluate(self, board) -> float:
-        player1_shortest_path = self.get_shortest_path(board, 1)
-        player2_shortest_path = self.get_shortest_path(board, 2)
+        own_path = self.get_shortest_path(board, self.id)
+        opponent_path = self.get_shortest_path(board, 3 - self.id)
 
-        own_path = player1_shortest_path if self.id == 1 else player2_shortest_path
-        opponent_path = player2_shortest_path if self.id == 1 else player1_shortest_path
-        
         path_difference = len(own_path) - len(opponent_path)
 
         # Penalize the longer opponent path
@@ -134,16 +126,18 @@ class MinMaxPlayer(BasePlayer):
 
         # Bonus for each tile placed on the player's own path
         own_path_bonus = 0.5  # Adjust this factor based on your preferences
+        own_tiles = set(own_path)
         for move in self.get_legal_moves(board):
-            if move in own_path:
+            if move in own_tiles:
                 path_score += own_path_bonus
-        
+
         return path_score
 
     def get_shortest_path(self, board, player_id):
+        # Returns tiles of a shortest connection of player, see Graph.shortest_path
         graph = Graph(board.board, player_id)
         return graph.get_shortest_path()
-    
+
     def get_whether_terminated(self,board):
         game = HexGameForAI(board)
         return game.check_finish()
@@ -151,88 +145,95 @@ class MinMaxPlayer(BasePlayer):
         
 class HexGameForAI:
     def __init__(self, board):
-        self.board = HexBoard(board.board)
-        
-    def check_finish(self) -> int:
-        # We build a "visited" matrix for both players, similar to bfs/dfs
-        visited = np.zeros(self.board.dim(), dtype=int)
-
-        # Check player 1 (red, top)
-        pl_id = 1
-        for j in range(visited.shape[1]):
-            if self.board.get_tile(0, j) == pl_id:
-                visited[0, j] = pl_id
-                visited = self.__visit(0, j, pl_id, visited)
-
-        if np.any(visited[-1, :] == pl_id):
-            return pl_id
-
-        # Check player 2 (blue, left)
-        pl_id = 2
-        for i in range(visited.shape[0]):
-            if self.board.get_tile(i, 0) == pl_id:
-                visited[i, 0] = pl_id
-                self.__visit (i, 0, pl_id, visited)
-
-        if np.any(visited[:, -1] == pl_id):
-            return pl_id
-
-        return 0  # game goes on
-    
-    def __visit(self, i, j, player, visited) -> np.ndarray:
-        x_dim, y_dim = self.board.dim()
-        candidates = [(i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j + 1), (i + 1, j), (i + 1, j - 1)]
-        neighbors = [(i, j) for (i, j) in candidates if 0 <= i < y_dim and 0 <= j < x_dim]
+        self.board = board
 
-        for (k, l) in neighbors:
-            if self.board.get_tile(k, l) == player and not visited[k, l]:
-                visited[k, l] = player
-                visited = self.__visit(k, l, player, visited)
-        return visited
+    def check_finish(self) -> int:
+        # The board keeps its connectivity up to date (see HexBoard.winner), no search needed
+        return self.board.winner()
 
 class Graph:
     def __init__(self, board, player_id):
-        self.board = HexBoard(board)
+        """
+        Shortest connection of a player's two edges on the current board.
+
+        Own tiles cost 0, empty tiles cost 1 and opponent tiles are blocked,
+        so the distance is the number of tiles the player still needs.
+
+        Parameters
+        ----------
+        board : numpy array
+            Matrix representation of board.
+        player_id : int
+            Player 1 connects top to bottom, player 2 left to right.
+
+        """
+        self.board = np.asarray(board)
         self.player_id = player_id
+        self._geometry = get_geometry(*self.board.shape)
+
+    def shortest_path(self) -> tuple:
+        """
+        Multi-source 0-1 BFS from the player's start edge to the end edge.
+
+        All start edge tiles are sources (a virtual source node), the search
+        stops at the first end edge tile taken from the deque (a virtual sink
+        node), which is one pass over the board instead of one search per
+        start tile.
+
+        Returns
+        -------
+        distance : float
+            Number of empty tiles missing for a connection (inf if blocked).
+        path : list of tuples (int, int)
+            Tiles of one shortest connection from start to end edge (empty if blocked).
 
-    def get_shortest_path(self):
-        start_positions = self.get_start_positions()
-        shortest_paths = []
-        for start_position in start_positions:
-            path = self.dijkstra(start_position)
-            shortest_paths.append(path)
-        return min(shortest_paths, key=len)
-
-    def get_start_positions(self):
-        if self.player_id == 1:
-            return [(0, j) for j in range(self.board.dim()[1])]
-        elif self.player_id == 2:
-            return [(i, 0) for i in range(self.board.dim()[0])]
-
-    def dijkstra(self, start_position):
-        x_dim, y_dim = self.board.dim()
-        heap = [(0, start_position)]
-        visited = set()
-
-        while heap:
-            current_distance, current_position = heapq.heappop(heap)
-            if current_position in visited:
-                continue
-
-            visited.add(current_position)
-
-            if self.player_id == 1 and current_position[0] == y_dim - 1:
-                return visited  # Player 1 connects top to bottom
-            elif self.player_id == 2 and current_position[1] == x_dim - 1:
-                return visited  # Player 2 connects left to right
-
-            neighbors = self.get_neighbors(current_position)
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    distance_to_neighbor = 1  # Assuming uniform edge weights
-                    heapq.heappush(heap, (current_distance + distance_to_neighbor, neighbor))
-
-    def get_neighbors(self, position):
-        i, j = position
-        candidates = [(i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j + 1), (i + 1, j), (i + 1, j - 1)]
-        return [(i, j) for (i, j) in candidates if 0 <= i < self.board.dim()[0] and 0 <= j < self.board.dim()[1]] 
\ No newline at end of file
+        """
+        g = self._geometry
+        own = self.player_id
+        opponent = 3 - own
+        tiles = self.board.ravel().tolist()
+        start, end = g.edges(own)
+
+        dist = [INF] * g.size
+        pred = [-1] * g.size
+        queue = deque()
+        for idx in iter_bits(start):
+            if tiles[idx] != opponent:
+                dist[idx] = 0 if tiles[idx] == own else 1
+                if dist[idx] == 0:
+                    queue.appendleft((0, idx))
+                else:
+                    queue.append((1, idx))
+
+        neighbor_ids = g.neighbor_ids
+        while queue:
+            d, idx = queue.popleft()
+            if d > dist[idx]:
+                continue  # outdated entry
+            if end >> idx & 1:
+                # Entries leave the deque in order of distance, so this is the shortest connection
+                path = []
+                while idx >= 0:
+                    path.append(divmod(idx, g.cols))
+                    idx = pred[idx]
+                path.reverse()
+                return d, path
+            for k in neighbor_ids[idx]:
+                tile = tiles[k]
+                if tile == opponent:
+                    continue
+                if tile == own:
+                    if d < dist[k]:
+                        dist[k] = d
+                        pred[k] = idx
+                        queue.appendleft((d, k))
+                elif d + 1 < dist[k]:
+                    dist[k] = d + 1
+                    pred[k] = idx
+                    queue.append((d + 1, k))
+
+        return INF, []
+
+    def get_shortest_path(self) -> list:
+        # Returns tiles of one shortest connection, see shortest_path.
+        return self.shortest_path()[1]
@@ -1,217 +1,676 @@
+from ai_player_improved import Graph
 from base_player import BasePlayer
-from hexgame import HexBoard
+from batch_evaluation import stack_children, connected, count_components
+from bitboard import BitHexBoard
+from board_geometry import get_geometry, iter_bits
+from candidate_moves import CandidateGenerator
+from parallel_search import WorkerPool
+from search_stats import SearchStats, MOVE_GENERATION, TERMINAL_CHECK, EVALUATION, HASHING
+from transposition_table import TranspositionTable, SharedTranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, NO_MOVE
+import multiprocessing
 import numpy as np
+import threading
 import time
-import copy
 
-DEPTH = 6
+DEPTH = 6  # Maximum depth of iterative deepening
+WIN_SCORE = 1000
+SECTIONS = (MOVE_GENERATION, TERMINAL_CHECK, EVALUATION, HASHING)  # Parts of the search time in SearchStats
+SIDE_TO_MOVE_KEY = 0x9E3779B97F4A7C15  # XORed into the hash when player 2 is to move (same in all processes)
+PATH_BONUS_RADIUS = 2  # Static move ordering prefers tiles up to this distance from shortest paths
+
+
+class SearchTimeout(Exception):
+    # Raised inside the search when the time for a move is up.
+    pass
+
 
 class MinMaxPlayer(BasePlayer):
-    def __init__(self, dimension):
+    def __init__(self, dimension, tt_size_mb=16, time_limit=10, max_depth=DEPTH,
+                 move_ordering=True, static_ordering=False, candidate_width=12, evaluation=None,
+                 batch_frontier=None, workers=1, transposition_table=None, ponder=False, stats_log=None):
         super().__init__()
-        self.cache = {}
+        # Fixed-size cache of search results, shared by all moves (and games) of this player
+        # and by all its worker processes
+        # (a table passed in belongs to the caller, close leaves it open)
+        self._owns_tt = transposition_table is None
+        if transposition_table is None:
+            transposition_table = (SharedTranspositionTable if workers > 1 else TranspositionTable)(tt_size_mb)
+        self.tt = transposition_table
+        self._tt_id = None
         self.dimension = dimension
-        self.zobrist_keys = self.initialize_zobrist_keys()
-
-    def initialize_zobrist_keys(self):
-        dim = (self.dimension, self.dimension)  # Assuming a default size for the Hex board
-        num_positions = dim[0] * dim[1]
-        num_players = 3  # 0 for empty, 1 for player 1, 2 for player 2
-        keys = np.random.randint(2**64, size=(num_positions, num_players), dtype=np.uint64)
-        return keys
-
-    def calculate_hash(self, board):
-        hash_val = np.uint64(0)  # Ensure the initial value is of type np.uint64
-        for i in range(board.dim()[0]):
-            for j in range(board.dim()[1]):
-                piece = board.get_tile(i, j)
-                player_id = np.uint64(0) if piece == 0 else np.uint64(piece)
-                position = i * board.dim()[1] + j
-                hash_val ^= self.zobrist_keys[position][player_id]
-        return hash_val
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self._deadline = float('inf')
+
+        # Statistics of the running search and of the last move, optionally appended to a JSONL file
+        self.stats = SearchStats(SECTIONS)
+        self.last_stats = None
+        self.stats_log = stats_log
+        self._tt_counts = (0, 0)
+
+        # Move ordering: killer moves per ply and history scores per player and tile
+        self.move_ordering = move_ordering
+        self.static_ordering = static_ordering
+        self.killers = []
+        self.history = None
+
+        # Only the best ranked candidate moves are searched (None: all legal moves)
+        self.candidates = CandidateGenerator(candidate_width) if candidate_width else None
+        self.depth_reached = 0
+
+        # Static evaluation function (board, player_id) -> score, e.g.
+        # djikstras_algorithm.get_heuristic_score or resistance.ResistanceEvaluator()
+        # (None: connected components)
+        self.evaluation = evaluation
+        # Evaluate all children of depth 1 nodes with one evaluate_children call. Only pays off for
+        # evaluation functions with a vectorized evaluate_boards (None: use it exactly then), the
+        # components evaluation is faster one by one on bitboards.
+        if batch_frontier is None:
+            batch_frontier = hasattr(evaluation, "evaluate_boards")
+        self.batch_frontier = batch_frontier
+
+        # Root splitting over worker processes (1: search in this process). Workers are started
+        # at the first move and reused, each keeps its own engine built from the same settings.
+        self.workers = workers
+        self._config = dict(dimension=dimension, tt_size_mb=tt_size_mb, time_limit=time_limit,
+                            max_depth=max_depth, move_ordering=move_ordering, static_ordering=static_ordering,
+                            candidate_width=candidate_width, evaluation=evaluation,
+                            batch_frontier=batch_frontier)
+        self._pool = None
+        self._alphas = None
+
+        # Pondering: during the opponent's turn a background thread searches the position after
+        # the predicted reply (only without worker processes). The table keeps what it finds.
+        self.ponder = ponder and workers == 1
+        self._ponder_thread = None
+        self._ponder_key = None
+        self._ponder_start = 0.0
+        self._ponder_move = None
+
+    @property
+    def nodes(self) -> int:
+        # Nodes visited by the running (or last) search.
+        return self.stats.nodes
+
+    def calculate_hash(self, board, to_move):
+        # The board keeps its Zobrist hash up to date with every move and undo. The same tiles are
+        # a different position with the other player to move (e.g. after a swap), so that is hashed too.
+        return board.zobrist_hash() ^ (SIDE_TO_MOVE_KEY if to_move == 2 else 0)
 
     def choose_tile(self, board, *args):
-        move = self.find_best_move(board, time_limit_seconds=10)
+        move = self._pondered_move(board)
+        if move is None:
+            move = self.find_best_move(board, time_limit_seconds=self.time_limit)
+        if self.ponder:
+            self._start_pondering(board, move)
         return move
 
     def find_best_move(self, board, time_limit_seconds):
+        # Iterative deepening: search depth 1, 2, ... until the time is up and
+        # return the best move of the deepest completed iteration.
         start_time = time.time()
-        eval, best_move = self.minimax(board, DEPTH)
-        
-        # legal_moves = self.get_legal_moves(board)
-        # best_move = None
-        # best_eval = float('-inf')
-
-        # for move in legal_moves:
-        #     clone_board = copy.deepcopy(board)
-        #     clone_board.set_tile(*move, 1)
-        #     if tuple(clone_board.board.flatten()) in self.cache:
-        #         eval = self.cache[tuple(clone_board.board.flatten())]
-        #     else:
-        #         eval, _ = self.minimax(clone_board, DEPTH)
-        #         self.cache[tuple(clone_board.board.flatten())] = eval
-
-        #     if eval > best_eval:
-        #         best_eval = eval
-        #         best_move = move
-
-        #     elapsed_time = time.time() - start_time
-        #     if elapsed_time > time_limit_seconds:
-        #         break
-        
-        return best_move
+        if self.workers > 1:
+            move = self._parallel_search(board, start_time + time_limit_seconds)
+        else:
+            self._start_search(start_time + time_limit_seconds)
+            # The whole search makes and takes back moves on one bitboard copy,
+            # the game board itself is never modified
+            move = self._iterative_deepening(BitHexBoard(board.board))
+        self._finish_search(start_time, move)
+        return move
 
-    def minimax(self, board, depth, alpha=float('-inf'), beta=float('inf'), maximizing_player=True):
-        hex_game = HexGameForAI(board)
+    def _iterative_deepening(self, search_board):
+        # Searches until the deadline set by _start_search (or moved by another thread) is reached.
+        legal_moves = self.get_legal_moves(search_board)
+        best_move = legal_moves[0]
+
+        for depth in range(1, min(self.max_depth, len(legal_moves)) + 1):
+            try:
+                eval, move = self.minimax(search_board, depth)
+            except SearchTimeout:
+                # Unfinished iteration, the board copy is left half-searched and dropped
+                break
+            if move is not None:
+                best_move = move
+            self.depth_reached = depth
+            if abs(eval) >= WIN_SCORE:
+                # Forced win or loss found, deeper search cannot change the result
+                break
 
-        if depth == 0 or hex_game.check_finish() != 0:
-            return self.evaluate(hex_game.board), None
+        return best_move
 
-        legal_moves = self.get_legal_moves(hex_game.board)
+    def predict_reply(self, board):
+        # Expected reply of the opponent (to move on board): best move stored by the last search,
+        # otherwise the best ranked candidate.
+        entry = self.tt.probe(self.calculate_hash(board, 3 - self.id))
+        if entry is not None and entry[3] != NO_MOVE:
+            move = divmod(entry[3], board.dim()[0])
+            if board.get_tile(*move) == 0:
+                return move
+        moves = self.get_candidate_moves(board, 2, 1)
+        return self.order_moves(board, moves, 3 - self.id, 1)[0]
+
+    def _start_pondering(self, board, move):
+        # Starts searching the position after move and the predicted reply in a background thread.
+        position = BitHexBoard(board.board)
+        position.play(move, self.id)
+        if position.winner() != 0:
+            return
+        position.play(self.predict_reply(position), 3 - self.id)
+        if position.winner() != 0:
+            return
+
+        self._ponder_key = self.id, position.key()
+        self._ponder_start = time.time()
+        self._ponder_move = None
+        # The deadline is set before the thread starts, so stop_pondering can always move it
+        self._start_search(float('inf'))
+        self._ponder_thread = threading.Thread(target=self._run_pondering, args=(position,), daemon=True)
+        self._ponder_thread.start()
+
+    def _run_pondering(self, position):
+        self._ponder_move = self._iterative_deepening(position)
+
+    def _pondered_move(self, board):
+        # Ponder hit: returns the move of the background search, which continues until it has had
+        # the normal time for a move (counted from its start, so it stops at once if the opponent
+        # took longer). Ponder miss or no pondering: returns None.
+        if self._ponder_thread is None:
+            return None
+        if self._ponder_key != (self.id, BitHexBoard(board.board).key()):
+            self.stop_pondering()
+            return None
+        self._deadline = self._ponder_start + self.time_limit
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self._finish_search(self._ponder_start, self._ponder_move)
+        return self._ponder_move
+
+    def stop_search(self):
+        # Ends a search running on another thread, which returns the best move of the deepest
+        # completed iteration (worker processes of a parallel search keep their deadline).
+        self._deadline = float('-inf')
+
+    def stop_pondering(self):
+        # Cancels a running background search and waits until it has stopped.
+        if self._ponder_thread is not None:
+            self._deadline = float('-inf')
+            self._ponder_thread.join()
+            self._ponder_thread = None
+
+    def _start_search(self, deadline, new_generation=True):
+        # Resets the per-move search state.
+        # new_generation: whether to age the entries of the transposition table (done by the parent
+        # for the workers of a parallel search)
+        self._deadline = deadline
+        if self._tt_id != self.id:
+            # Scores are stored from our point of view, which changes when the player gets the other color
+            self.tt.clear()
+            self._tt_id = self.id
+        if new_generation:
+            self.tt.new_search()
+        self.stats = SearchStats(SECTIONS)
+        self._tt_counts = self.tt.probes, self.tt.hits
+        self.depth_reached = 0
+        self.killers = []
+        if self.history is not None:
+            # Old history still helps, but should not outweigh what the new search learns
+            self.history = [None] + [[score // 2 for score in scores] for scores in self.history[1:]]
+
+    def _collect_tt_stats(self):
+        # Adds the probes and hits of the transposition table since the last call to the statistics.
+        probes, hits = self._tt_counts
+        self.stats.tt_probes += self.tt.probes - probes
+        self.stats.tt_hits += self.tt.hits - hits
+        self._tt_counts = self.tt.probes, self.tt.hits
+
+    def _finish_search(self, start_time, move):
+        # Completes the statistics of the search for a move, keeps them as last_stats and logs them.
+        stats = self.stats
+        self._collect_tt_stats()
+        stats.move = move
+        stats.seconds = time.time() - start_time
+        stats.depth = self.depth_reached
+        self.last_stats = stats
+        if self.stats_log is not None:
+            stats.write(self.stats_log, player=self.id)
+
+    def _parallel_search(self, board, deadline):
+        # Root splitting: the ranked root moves are dealt round-robin to the workers, which
+        # deepen iteratively on their share and pass alpha bounds to each other.
+        if self._pool is None:
+            self._alphas = multiprocessing.Array('d', self.dimension * self.dimension + 1)
+            self._pool = WorkerPool(self.workers, _init_search_worker, self._config, self._alphas, self.tt)
+        if self._tt_id != self.id:
+            # Cleared here once for all workers, not by each worker while others already search
+            self.tt.clear()
+            self._tt_id = self.id
+        self.tt.new_search()
+        with self._alphas.get_lock():
+            self._alphas[:] = [float('-inf')] * len(self._alphas)
+        self.stats = SearchStats(SECTIONS)
+        self._tt_counts = self.tt.probes, self.tt.hits
+        self.depth_reached = 0
+
+        search_board = BitHexBoard(board.board)
+        moves = self.get_candidate_moves(search_board, 2, 0)
+        moves = self.order_moves(search_board, moves, self.id, 0)
+        max_depth = min(self.max_depth, len(self.get_legal_moves(search_board)))
+        shares = [moves[k::self.workers] for k in range(self.workers)]
+        results = self._pool.run(_search_root_moves, [(board.board, self.id, share, deadline, max_depth)
+                                                      for share in shares if share])
+        for _, _, (stats, tt_counts) in results:
+            self.stats.merge(stats)
+            self.tt.add_counts(tt_counts)
+        # Probes and hits of the workers are in their stats already
+        self._tt_counts = self.tt.probes, self.tt.hits
+
+        # Compare all shares at the deepest depth every worker has completed, workers that
+        # stopped early with a decided result count with their last depth
+        unfinished = [iterations[-1][0] for iterations, finished, _ in results if iterations and not finished]
+        completed = [iterations[-1][0] for iterations, _, _ in results if iterations]
+        if not completed:
+            return moves[0]
+        target = min(unfinished) if unfinished else max(completed)
+        best = None
+        for iterations, _, _ in results:
+            reached = [iteration for iteration in iterations if iteration[0] <= target]
+            if reached:
+                depth, value, move, exact = reached[-1]
+                if best is None or (value, exact) > best[:2]:
+                    best = value, exact, move
+        self.depth_reached = target
+        return best[2]
+
+    def search_root_moves(self, board, moves, max_depth, shared_alphas=None):
+        """
+        Iterative deepening over a subset of the root moves.
+
+        Used by the workers of a parallel search. Each root move is searched
+        with the best value found so far at that depth by any worker as
+        alpha (shared_alphas[depth]), so most moves only need to be refuted.
+
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board, this player is to move.
+        moves : list of tuples (int, int)
+            Root moves to search, best ranked first.
+        max_depth : int
+            Maximum depth of iterative deepening.
+        shared_alphas : multiprocessing.Array, optional
+            Best value per depth over all workers.
+
+        Returns
+        -------
+        iterations : list of tuples (int, float, tuple, bool)
+            Per completed depth: depth, best value, best move and whether
+            the value is exact (otherwise an upper bound below the best
+            value of another worker).
+        finished : bool
+            Whether deepening stopped before the time was up.
+
+        """
+        iterations = []
+        moves = list(moves)
+        for depth in range(1, max_depth + 1):
+            values = {}
+            best_value, best_move, best_exact = float('-inf'), None, False
+            try:
+                for move in moves:
+                    alpha = best_value
+                    if shared_alphas is not None:
+                        alpha = max(alpha, shared_alphas[depth])
+                    board.play(move, self.id)
+                    value, _ = self.minimax(board, depth - 1, alpha, float('inf'), False, 1)
+                    board.undo()
+                    values[move] = value
+                    if value > best_value:
+                        best_value, best_move, best_exact = value, move, value > alpha
+                    if shared_alphas is not None and value > alpha:
+                        with shared_alphas.get_lock():
+                            # A won move settles all deeper iterations as well
+                            for d in range(depth, len(shared_alphas) if value >= WIN_SCORE else depth + 1):
+                                shared_alphas[d] = max(shared_alphas[d], value)
+            except SearchTimeout:
+                return iterations, False
+            iterations.append((depth, best_value, best_move, best_exact))
+            self.depth_reached = depth
+            if abs(best_value) >= WIN_SCORE:
+                return iterations, True
+            # Best moves of this iteration first in the next one
+            moves.sort(key=values.get, reverse=True)
+        return iterations, True
+
+    def close(self):
+        # Stops pondering and the worker processes of a parallel search and frees the shared
+        # transposition table. The player cannot search afterwards.
+        self.stop_pondering()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._owns_tt:
+            self.tt.close()
+
+    def minimax(self, board, depth, alpha=float('-inf'), beta=float('inf'), maximizing_player=True, ply=0):
+        if time.time() > self._deadline:
+            raise SearchTimeout()
+        stats = self.stats
+        stats.nodes += 1
+        if ply > stats.max_ply:
+            stats.max_ply = ply
+
+        # Hashing includes the lookup in the transposition table
+        start = time.perf_counter()
+        hash_val = self.calculate_hash(board, self.id if maximizing_player else 3 - self.id)
+        cols = board.dim()[0]
+
+        tt_move = None
+        entry = self.tt.probe(hash_val)
+        if entry is not None:
+            score, entry_depth, flag, move = entry
+            tt_move = divmod(move, cols) if move != NO_MOVE else None
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    stats.times[HASHING] += time.perf_counter() - start
+                    return score, tt_move
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                elif flag == UPPER_BOUND:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    stats.times[HASHING] += time.perf_counter() - start
+                    return score, tt_move
+        now = time.perf_counter()
+        stats.times[HASHING] += now - start
+
+        decided = False
+        if depth > 0:
+            decided = board.winner() != 0
+            start, now = now, time.perf_counter()
+            stats.times[TERMINAL_CHECK] += now - start
+
+        if depth == 0 or decided:
+            evaluation_value = self.evaluate(board)
+            stats.leaf_evaluations += 1
+            stats.times[EVALUATION] += time.perf_counter() - now
+            self.tt.store(hash_val, depth, evaluation_value, EXACT)
+            return evaluation_value, None
+
+        alpha_orig, beta_orig = alpha, beta
+        value, best_move = self._search_children(board, depth, alpha, beta, maximizing_player, ply, tt_move)
+
+        if value <= alpha_orig:
+            flag = UPPER_BOUND
+        elif value >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        move = best_move[0] * cols + best_move[1] if best_move is not None else NO_MOVE
+        self.tt.store(hash_val, depth, value, flag, move)
+        return value, best_move
+
+    def _search_children(self, board, depth, alpha, beta, maximizing_player, ply, tt_move):
+        if depth == 1 and self.batch_frontier:
+            return self._search_frontier(board, alpha, beta, maximizing_player, ply, tt_move)
+        start = time.perf_counter()
+        player = self.id if maximizing_player else 3 - self.id
+        legal_moves = self.get_candidate_moves(board, depth, ply, tt_move)
+        legal_moves = self.order_moves(board, legal_moves, player, ply, tt_move)
+        self.stats.times[MOVE_GENERATION] += time.perf_counter() - start
         if maximizing_player:
             max_eval = float('-inf')
             best_move = None
-            for move in legal_moves:
-                new_board = HexBoard(hex_game.board.board)
-                new_board.set_tile(*move, 1)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, False)
+            for index, move in enumerate(legal_moves):
+                board.play(move, self.id)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, False, ply + 1)
+                board.undo()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
                 alpha = max(alpha, eval)
                 if alpha >= beta:
+                    self._record_cutoff(board, move, self.id, depth, ply, tt_move, index == 0)
                     break
             return max_eval, best_move
         else:
             min_eval = float('inf')
             best_move = None
-            for move in legal_moves:
-                new_board = HexBoard(hex_game.board.board)
-                new_board.set_tile(*move, 2)
-                eval, _ = self.minimax(new_board, depth - 1, alpha, beta, True)
+            for index, move in enumerate(legal_moves):
+                board.play(move, 3 - self.id)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, True, ply + 1)
+                board.undo()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
                 beta = min(beta, eval)
                 if alpha >= beta:
+                    self._record_cutoff(board, move, 3 - self.id, depth, ply, tt_move, index == 0)
                     break
 
             return min_eval, best_move
 
+    def _search_frontier(self, board, alpha, beta, maximizing_player, ply, tt_move):
+        # Depth 1: all children are leaves, so they are scored in one batch instead of searched one by one.
+        stats = self.stats
+        start = time.perf_counter()
+        player = self.id if maximizing_player else 3 - self.id
+        legal_moves = self.get_candidate_moves(board, 1, ply, tt_move)
+        legal_moves = self.order_moves(board, legal_moves, player, ply, tt_move)
+        now = time.perf_counter()
+        stats.times[MOVE_GENERATION] += now - start
+
+        scores = self.evaluate_children(board, legal_moves, player)
+        stats.times[EVALUATION] += time.perf_counter() - now
+        stats.nodes += len(legal_moves)
+        stats.leaf_evaluations += len(legal_moves)
+        if ply + 1 > stats.max_ply:
+            stats.max_ply = ply + 1
+
+        best = int(np.argmax(scores) if maximizing_player else np.argmin(scores))
+        value, best_move = float(scores[best]), legal_moves[best]
+        if value >= beta if maximizing_player else value <= alpha:
+            # The first child alone would have failed high as well
+            first = bool(scores[0] >= beta if maximizing_player else scores[0] <= alpha)
+            self._record_cutoff(board, best_move, player, 1, ply, tt_move, first)
+        return value, best_move
+
+    def order_moves(self, board, moves, player, ply, tt_move=None):
+        """
+        Sorts moves such that alpha-beta cuts off as early as possible.
+
+        Order: move from the transposition table, killer moves of this ply,
+        then all other moves by their history score (plus a bonus for tiles
+        close to the current shortest paths if static ordering is enabled).
+
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board.
+        moves : list of tuples (int, int)
+            Moves to sort.
+        player : int
+            Player making the moves.
+        ply : int
+            Distance of the node from the root of the search.
+        tt_move : tuple (int, int), optional
+            Best move stored in the transposition table for this position.
+
+        Returns
+        -------
+        moves : list of tuples (int, int)
+            Sorted moves.
+
+        """
+        if not self.move_ordering:
+            return moves
+
+        cols = board.dim()[0]
+        history = self._history_table(board)[player]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        bonus = self.path_distance_bonus(board) if self.static_ordering else None
+
+        def priority(move):
+            idx = move[0] * cols + move[1]
+            score = history[idx] + (bonus[idx] if bonus is not None else 0)
+            return move == tt_move, move in killers, score
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def path_distance_bonus(self, board) -> list:
+        # Returns per tile bonus for being on or close to the current shortest path of either player.
+        x_dim, y_dim = board.dim()
+        g = get_geometry(y_dim, x_dim)
+        ring = 0
+        for player in (1, 2):
+            for (i, j) in get_shortest_path(board.board, player):
+                ring |= 1 << (i * x_dim + j)
+
+        bonus = [0] * g.size
+        seen = 0
+        for distance in range(PATH_BONUS_RADIUS + 1):
+            for idx in iter_bits(ring & ~seen):
+                bonus[idx] = PATH_BONUS_RADIUS + 1 - distance
+            seen |= ring
+            ring = g.dilate(ring)
+        return bonus
+
+    def _record_cutoff(self, board, move, player, depth, ply, tt_move, first=False):
+        # Remembers a move that caused a beta cutoff as killer of its ply and in the history table.
+        # first: whether it was the first move searched
+        self.stats.cutoffs += 1
+        self.stats.first_move_cutoffs += first
+        if not self.move_ordering or move == tt_move:
+            return
+        if ply >= len(self.killers):
+            self.killers.extend([None, None] for _ in range(ply + 1 - len(self.killers)))
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        cols = board.dim()[0]
+        self._history_table(board)[player][move[0] * cols + move[1]] += depth * depth
+
+    def _history_table(self, board) -> list:
+        # History scores per player and tile, created for the size of the board.
+        size = board.dim()[0] * board.dim()[1]
+        if self.history is None or len(self.history[1]) != size:
+            self.history = [None, [0] * size, [0] * size]
+        return self.history
+
     def get_legal_moves(self, board):
-        valid_moves = [(i, j) for i in range(board.dim()[1]) for j in range(board.dim()[0]) if board.get_tile(i, j) == 0]
-        return valid_moves
+        return board.legal_moves()
+
+    def get_candidate_moves(self, board, depth, ply, tt_move=None):
+        # Moves worth searching: the candidate subset (twice as wide at the root) plus the stored best move.
+        # Shortest paths are only computed where they pay off, i.e. not right above the leaves.
+        if self.candidates is None:
+            return self.get_legal_moves(board)
+        width = self.candidates.width * (2 if ply == 0 else 1)
+        moves = self.candidates.generate(board, width, use_paths=self.candidates.use_paths and depth >= 2)
+        if tt_move is not None and tt_move not in moves and board.get_tile(*tt_move) == 0:
+            moves.append(tt_move)
+        return moves
 
     def evaluate(self, board):
-        hash_val = self.calculate_hash(board)
-
-        if hash_val in self.cache:
-            return self.cache[hash_val]
-
-        player1_connected = self.check_player_connected(board, 1)
-        player2_connected = self.check_player_connected(board, 2)
-
-        if player1_connected:
-            evaluation_value = 1000  # Player 1 wins
-        elif player2_connected:
-            evaluation_value = -1000  # Player 2 wins
+        # Static evaluation, results are cached in the transposition table by minimax
+        # Evaluation is from the point of view of this player (the maximizing one)
+        own_connected = self.check_player_connected(board, self.id)
+        opponent_connected = self.check_player_connected(board, 3 - self.id)
+
+        if own_connected:
+            evaluation_value = WIN_SCORE  # We win
+        elif opponent_connected:
+            evaluation_value = -WIN_SCORE  # Opponent wins
+        elif self.evaluation is not None:
+            # Scores of decided positions are clamped, so only actual wins reach WIN_SCORE
+            evaluation_value = min(max(self.evaluation(board.board, self.id), 1 - WIN_SCORE), WIN_SCORE - 1)
         else:
             # Evaluate based on the number of connected components for each player
-            player1_components = self.count_connected_components(board, 1)
-            player2_components = self.count_connected_components(board, 2)
-            evaluation_value = player1_components - player2_components
+            own_components = self.count_connected_components(board, self.id)
+            opponent_components = self.count_connected_components(board, 3 - self.id)
+            evaluation_value = own_components - opponent_components
 
-        self.cache[hash_val] = evaluation_value
         return evaluation_value
 
-    def check_player_connected(self, board, player_id):
-        if player_id == 1:
-            # Check if player 1 is connected from top to bottom
-            for j in range(board.dim()[1]):
-                if self.dfs(board, 0, j, player_id, set()):
-                    return True
-        elif player_id == 2:
-            # Check if player 2 is connected from left to right
-            for i in range(board.dim()[0]):
-                if self.dfs(board, i, 0, player_id, set()):
-                    return True
-        return False
-
-    def dfs(self, board, i, j, player_id, visited):
-        if not (0 <= i < board.dim()[0]) or not (0 <= j < board.dim()[1]) or board.get_tile(i, j) != player_id:
-            return False
-
-        if (i, j) in visited:
-            return False
-
-        visited.add((i, j))
-
-        if player_id == 1 and i == board.dim()[0] - 1:
-            return True
-        elif player_id == 2 and j == board.dim()[1] - 1:
-            return True
-
-        neighbors = [(i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j + 1), (i + 1, j), (i + 1, j - 1)]
-
-        for neighbor in neighbors:
-            if self.dfs(board, neighbor[0], neighbor[1], player_id, visited):
-                return True
+    def evaluate_children(self, board, moves, player):
+        """
+        Evaluates the positions after each of the moves in one vectorized call.
+
+        Gives the same scores as evaluate on each child. Children are
+        stacked into one (k, rows, cols) array, connections and components
+        are found by vectorized flood fills (batch_evaluation). Evaluation
+        functions with an evaluate_boards method (e.g. ResistanceEvaluator)
+        score the whole stack at once.
+
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board, not decided yet.
+        moves : list of tuples (int, int)
+            Moves on empty tiles.
+        player : int
+            Player making the moves.
+
+        Returns
+        -------
+        scores : numpy array
+            Evaluation of each child from the point of view of this player.
+
+        """
+        # Only the player making the move can have won (the parent is not decided yet)
+        children = stack_children(board.board, moves, player)
+        won = connected(children, player)
+        if self.evaluation is None:
+            scores = count_components(children, self.id) - count_components(children, 3 - self.id)
+        else:
+            if hasattr(self.evaluation, "evaluate_boards"):
+                scores = self.evaluation.evaluate_boards(children, self.id)
+            else:
+                scores = np.array([self.evaluation(child, self.id) for child in children], dtype=float)
+            scores = np.clip(scores, 1 - WIN_SCORE, WIN_SCORE - 1)
+        return np.where(won, WIN_SCORE if player == self.id else -WIN_SCORE, scores)
 
-        return False
+    def check_player_connected(self, board, player_id):
+        # Player 1 connects top to bottom, player 2 left to right
+        return board.is_connected(player_id)
 
     def count_connected_components(self, board, player_id):
-        visited = set()
-        components = 0
-
-        for i in range(board.dim()[0]):
-            for j in range(board.dim()[1]):
-                if board.get_tile(i, j) == player_id and (i, j) not in visited:
-                    components += 1
-                    self.dfs(board, i, j, player_id, visited)
-
-        return components
+        return board.count_components(player_id)
     
     def get_whether_terminated(self,board):
         game = HexGameForAI(board)
         return game.check_finish()
        
+def _init_search_worker(index, config, alphas, tt) -> MinMaxPlayer:
+    # Engine of a worker process on the shared transposition table, keeps the shared alpha bounds of the root moves.
+    player = MinMaxPlayer(transposition_table=tt, **config)
+    player._alphas = alphas
+    return player
+
+
+def _search_root_moves(player, position, player_id, moves, deadline, max_depth) -> tuple:
+    # Searches a share of the root moves in a worker, returns iterations, finished, its SearchStats and
+    # the counters of the transposition table.
+    player.set_id(player_id)
+    player._tt_id = player_id  # the shared table was cleared and aged by the parent
+    player.tt.reset_stats()
+    player._start_search(deadline, new_generation=False)
+    iterations, finished = player.search_root_moves(BitHexBoard(position), moves, max_depth, player._alphas)
+    player._collect_tt_stats()
+    player.stats.depth = player.depth_reached
+    return iterations, finished, (player.stats, player.tt.counts())
+
+
+def get_shortest_path(board, player_id) -> list:
+    # Tiles of a shortest path of player, see ai_player_improved.Graph.
+    return Graph(board, player_id).get_shortest_path()
+
+
 class HexGameForAI:
     def __init__(self, board):
-        self.board = HexBoard(board.board)
-        
+        self.board = board
+
     def check_finish(self) -> int:
-        # We build a "visited" matrix for both players, similar to bfs/dfs
-        visited = np.zeros(self.board.dim(), dtype=int)
-
-        # Check player 1 (red, top)
-        pl_id = 1
-        for j in range(visited.shape[1]):
-            if self.board.get_tile(0, j) == pl_id:
-                visited[0, j] = pl_id
-                visited = self.__visit(0, j, pl_id, visited)
-
-        if np.any(visited[-1, :] == pl_id):
-            return pl_id
-
-        # Check player 2 (blue, left)
-        pl_id = 2
-        for i in range(visited.shape[0]):
-            if self.board.get_tile(i, 0) == pl_id:
-                visited[i, 0] = pl_id
-                self.__visit (i, 0, pl_id, visited)
-
-        if np.any(visited[:, -1] == pl_id):
-            return pl_id
-
-        return 0  # game goes on
-    
-    def __visit(self, i, j, player, visited) -> np.ndarray:
-        x_dim, y_dim = self.board.dim()
-        candidates = [(i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j + 1), (i + 1, j), (i + 1, j - 1)]
-        neighbors = [(i, j) for (i, j) in candidates if 0 <= i < y_dim and 0 <= j < x_dim]
-
-        for (k, l) in neighbors:
-            if self.board.get_tile(k, l) == player and not visited[k, l]:
-                visited[k, l] = player
-                visited = self.__visit(k, l, player, visited)
-        return visited
+        # The board keeps its connectivity up to date (see HexBoard.winner), no search needed
+        return self.board.winner()
@@ -1,10 +1,16 @@
 import numpy as np
 import time
 
-import pygame
+THINK_TIME = 0.5  # Seconds random moves are delayed, so they can be followed on screen
 
 
 class BasePlayer:
+    # Interactive players get the clicked tile as arguments of choose_tile and must return at once,
+    # all others are run on a background thread by HexApp.
+    interactive = False
+    # SearchStats of the last move of search players, None for players without statistics
+    last_stats = None
+
     def __init__(self, swap_fun=lambda board, *args: False):
         """
         Initializes base player instance with user-defined "swap player" algorithm.
@@ -41,15 +47,36 @@ class BasePlayer:
         args : tuple, optional
             Further parameters in tuple possibly required by heuristic.
 
+        Returns
+        -------
+        res : tuple (int, int) or concurrent.futures.Future
+            Indices of resulting tile, or a future of them (e.g. of a search
+            running in another process).
+
         Raises Exception.
 
         """
         raise NotImplementedError("Please derive a class and implement this method.")
 
+    def stop_search(self):
+        # Asks a running choose_tile (on another thread) to return its best move so far, e.g. on timeout.
+        pass
+
+    def stop_pondering(self):
+        # Stops thinking during the opponent's turn (for players that do, e.g. MinMaxPlayer(ponder=True)).
+        pass
+
+    def close(self):
+        # Frees worker processes and shared memory once the player is no longer needed.
+        pass
+
     def claim_swap(self, board, *args) -> bool:
         """
         Determines whether to claim a swap on given heuristic / algorithm.
 
+        With the swap, the opponent's first tile (i, j) becomes tile (j, i)
+        of this player, who keeps its color (and id); the opponent moves next.
+
         Parameters
         ----------
         board : HexBoard
@@ -68,7 +95,7 @@ class BasePlayer:
         return res
 
     @classmethod
-    def random_choice(cls, board, *args) -> tuple:
+    def random_choice(cls, board, *args, think_time=THINK_TIME) -> tuple:
         """
         Implements random tile picking "heuristic".
 
@@ -78,6 +105,8 @@ class BasePlayer:
             Current state of the Hex board.
         args : tuple, optional
             Further parameters in tuple possibly required by heuristic.
+        think_time : float
+            Seconds to wait before returning (0 for games without GUI).
 
         Returns
         -------
@@ -99,7 +128,8 @@ class BasePlayer:
             j = np.random.randint(xdim)
         res = (i, j)
 
-        time.sleep(0.5)  # Simulate thinking
+        if think_time > 0:
+            time.sleep(think_time)  # Simulate thinking
 
         return res
 
@@ -149,6 +179,8 @@ class BasePlayer:
 
         """
 
+        import pygame  # only needed with GUI, games without GUI must not depend on pygame
+
         # This blocks the whole event loop until a key is pressed:
         # NOTE: The same strategy could of course also be applied to the tile selection!
         print("Shall swap rule be applied? 1: Yes; otherwise: No")
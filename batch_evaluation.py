@@ -0,0 +1,145 @@
+import numpy as np
+
+INF = np.inf
+
+
+def stack_children(board, moves, player) -> np.ndarray:
+    """
+    Stacks the positions after each of the moves.
+
+    Parameters
+    ----------
+    board : HexBoard or numpy array
+        Current state of the Hex board.
+    moves : list of tuples (int, int)
+        Moves on empty tiles.
+    player : int
+        Player making the moves.
+
+    Returns
+    -------
+    children : numpy array
+        Boards after each move, shape (k, rows, cols).
+
+    """
+    board = np.asarray(getattr(board, "board", board))
+    children = np.repeat(board[np.newaxis], len(moves), axis=0)
+    if moves:
+        rows, cols = zip(*moves)
+        children[np.arange(len(moves)), rows, cols] = player
+    return children
+
+
+def _shifted(values, fill) -> list:
+    # Values of the six hex neighbors of every tile of a stack (k, rows, cols), fill outside the board.
+    padded = np.pad(values, ((0, 0), (1, 1), (1, 1)), constant_values=fill)
+    return [
+        padded[:, 1:-1, :-2], padded[:, 1:-1, 2:],  # (0, -1), (0, 1)
+        padded[:, :-2, 1:-1], padded[:, 2:, 1:-1],  # (-1, 0), (1, 0)
+        padded[:, :-2, 2:], padded[:, 2:, :-2],  # (-1, 1), (1, -1)
+    ]
+
+
+def neighbor_min(values, fill) -> np.ndarray:
+    # Minimum over the six hex neighbors of every tile of a stack (k, rows, cols).
+    return np.minimum.reduce(_shifted(values, fill))
+
+
+def neighbor_any(mask) -> np.ndarray:
+    # Whether any of the six hex neighbors of every tile of a stack (k, rows, cols) is set.
+    return np.logical_or.reduce(_shifted(mask, False))
+
+
+def neighbor_count(mask) -> np.ndarray:
+    # Number of set hex neighbors of every tile of a stack (k, rows, cols).
+    return np.add.reduce(_shifted(mask.astype(int), 0))
+
+
+def _oriented(boards, player) -> np.ndarray:
+    # Player 2 is handled as player 1 on the transposed boards (the hex neighborhood is symmetric).
+    return boards if player == 1 else boards.transpose(0, 2, 1)
+
+
+def shortest_distances(boards, player) -> np.ndarray:
+    """
+    Number of empty tiles each board still needs for a connection of player.
+
+    Distances are relaxed over all tiles at once by hex shifts until they
+    do not change anymore: own tiles cost 0, empty tiles 1, opponent tiles
+    are blocked (same as ai_player_improved.Graph).
+
+    Parameters
+    ----------
+    boards : numpy array
+        Stack of boards, shape (k, rows, cols).
+    player : int
+        Player 1 connects top to bottom, player 2 left to right.
+
+    Returns
+    -------
+    distances : numpy array
+        Distance of each board, shape (k,), 0 if connected and inf if blocked.
+
+    """
+    boards = _oriented(boards, player)
+    cost = np.where(boards == player, 0.0, np.where(boards == 0, 1.0, INF))
+    dist = np.full(cost.shape, INF)
+    dist[:, 0] = cost[:, 0]
+    while True:
+        relaxed = np.minimum(dist, neighbor_min(dist, INF) + cost)
+        if np.array_equal(relaxed, dist):
+            return dist[:, -1].min(axis=1)
+        dist = relaxed
+
+
+def connected(boards, player) -> np.ndarray:
+    # Whether player has connected the edges on each board of a stack, shape (k,).
+    own = _oriented(boards, player) == player
+    reached = own.copy()
+    reached[:, 1:] = False
+    while True:
+        grown = own & (reached | neighbor_any(reached))
+        if np.array_equal(grown, reached):
+            return reached[:, -1].any(axis=1)
+        reached = grown
+
+
+def count_components(boards, player) -> np.ndarray:
+    # Number of connected groups of tiles of player on each board of a stack, shape (k,).
+    k, rows, cols = boards.shape
+    own = boards == player
+    index = np.arange(rows * cols).reshape(rows, cols)
+    labels = np.where(own, index, rows * cols)
+    while True:
+        # Every group ends up labeled by its smallest tile index
+        relaxed = np.where(own, np.minimum(labels, neighbor_min(labels, rows * cols)), rows * cols)
+        if np.array_equal(relaxed, labels):
+            return (own & (labels == index)).sum(axis=(1, 2))
+        labels = relaxed
+
+
+class DistanceEvaluator:
+    def __call__(self, board, player_id) -> float:
+        # Allows using the evaluator as evaluation function of MinMaxPlayer.
+        boards = np.asarray(getattr(board, "board", board))[np.newaxis]
+        return float(self.evaluate_boards(boards, player_id)[0])
+
+    def evaluate_boards(self, boards, player_id) -> np.ndarray:
+        """
+        Shortest path score of a stack of boards: tiles the opponent still
+        needs minus tiles player_id still needs.
+
+        Parameters
+        ----------
+        boards : numpy array
+            Stack of boards, shape (k, rows, cols).
+        player_id : int
+            Player the scores are computed for.
+
+        Returns
+        -------
+        scores : numpy array
+            Score of each board, shape (k,).
+
+        """
+        return shortest_distances(boards, 3 - player_id) - shortest_distances(boards, player_id)
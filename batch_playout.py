@@ -0,0 +1,122 @@
+import numpy as np
+
+from batch_evaluation import connected
+
+
+class PlayoutStatistics:
+    def __init__(self, player, playouts, wins, cell_owned, cell_wins):
+        """
+        Results of a batch of random playouts.
+
+        Parameters
+        ----------
+        player : int
+            Player to move in the evaluated position.
+        playouts : int
+            Number of playouts.
+        wins : int
+            Playouts won by player.
+        cell_owned : numpy array
+            Per tile: playouts in which player got the tile.
+        cell_wins : numpy array
+            Per tile: playouts in which player got the tile and won.
+
+        """
+        self.player = player
+        self.playouts = playouts
+        self.wins = wins
+        self.cell_owned = cell_owned
+        self.cell_wins = cell_wins
+
+    def win_rate(self) -> float:
+        # Fraction of playouts won by the player to move.
+        return self.wins / self.playouts
+
+    def heatmap(self) -> np.ndarray:
+        # Per tile: win rate of the player to move in playouts where the player got the tile (nan if never).
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.cell_wins / self.cell_owned
+
+
+def random_fills(board, batch_size, player, rng=None) -> np.ndarray:
+    """
+    Fills all empty tiles of batch_size copies of the board at random.
+
+    The empty tiles of each copy are put in random order (one argsort of
+    a random matrix), player gets the first half (rounded up) and the
+    opponent the rest, as if both had played alternately.
+
+    Parameters
+    ----------
+    board : HexBoard or numpy array
+        Current state of the Hex board.
+    batch_size : int
+        Number of filled boards.
+    player : int
+        Player to move.
+    rng : numpy.random.Generator, optional
+        Source of randomness.
+
+    Returns
+    -------
+    boards : numpy array
+        Filled boards, shape (batch_size, rows, cols).
+
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    board = np.asarray(getattr(board, "board", board))
+    empty = np.flatnonzero(board == 0)
+    half = (len(empty) + 1) // 2
+
+    order = np.argsort(rng.random((batch_size, len(empty))), axis=1)
+    fills = np.full((batch_size, len(empty)), 3 - player, dtype=board.dtype)
+    fills[np.arange(batch_size)[:, np.newaxis], order[:, :half]] = player
+
+    boards = np.repeat(board.reshape(1, -1), batch_size, axis=0)
+    boards[:, empty] = fills
+    return boards.reshape(batch_size, *board.shape)
+
+
+def batch_playouts(board, batch_size, player, rng=None) -> PlayoutStatistics:
+    """
+    Plays batch_size random games from the board at once.
+
+    A filled Hex board has exactly one winner, so all games are decided by
+    one vectorized flood fill of player 1's tiles from the top row (see
+    HexGame.check_finish).
+
+    Parameters
+    ----------
+    board : HexBoard or numpy array
+        Current state of the Hex board (not decided yet).
+    batch_size : int
+        Number of playouts.
+    player : int
+        Player to move.
+    rng : numpy.random.Generator, optional
+        Source of randomness.
+
+    Returns
+    -------
+    statistics : PlayoutStatistics
+        Wins of player and per tile win statistics.
+
+    """
+    boards = random_fills(board, batch_size, player, rng)
+    won = connected(boards, 1) == (player == 1)
+    owned = boards == player
+    return PlayoutStatistics(player, batch_size, int(won.sum()), owned.sum(axis=0),
+                             owned[won].sum(axis=0))
+
+
+def win_heatmap(board, player, batch_size=10000, rng=None) -> np.ndarray:
+    # Per tile: estimated win probability of player when getting the tile in a random game.
+    return batch_playouts(board, batch_size, player, rng).heatmap()
+
+
+if __name__ == "__main__":
+    dim = 11
+    statistics = batch_playouts(np.zeros((dim, dim), dtype=int), 10000, 1)
+    print("Player 1 wins {:.1%} of random games on an empty {:d}x{:d} board".format(
+        statistics.win_rate(), dim, dim))
+    print(np.array2string(statistics.heatmap(), precision=2))
@@ -0,0 +1,402 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from batch_evaluation import DistanceEvaluator
+from bitboard import BitHexBoard
+from ai_player import AIPlayer
+from ai_player_improved_zobrist_2 import MinMaxPlayer, HexGameForAI
+from djikstras_algorithm import get_heuristic_score
+from game_runner import play_game
+from hexgame import HexBoard
+from mcts_player import MCTSPlayer, RAVE_EQUIVALENCE
+from resistance import ResistanceEvaluator
+
+# Fraction of occupied tiles in positions of each stage
+STAGES = {"opening": 0.06, "midgame": 0.3, "endgame": 0.55}
+
+
+def benchmark_positions(dim, stage, count=5, seed=0) -> list:
+    """
+    Creates a fixed set of random positions that are not yet decided.
+
+    Parameters
+    ----------
+    dim : int
+        Size of the (dim x dim) board.
+    stage : str
+        One of "opening", "midgame", "endgame".
+    count : int
+        Number of positions.
+    seed : int
+        Seed, the same arguments always give the same positions.
+
+    Returns
+    -------
+    positions : list of numpy arrays
+        Matrix representations of the positions (player 1 and 2 moved alternately).
+
+    """
+    rng = np.random.default_rng([seed, dim, list(STAGES).index(stage)])
+    n_stones = max(1, int(STAGES[stage] * dim * dim))
+    positions = []
+    while len(positions) < count:
+        board = BitHexBoard(np.zeros((dim, dim), dtype=int))
+        for k, idx in enumerate(rng.permutation(dim * dim)[:n_stones]):
+            board.set_tile(*divmod(int(idx), dim), 1 + k % 2)
+        if board.winner() == 0:
+            positions.append(board.board)
+    return positions
+
+
+def player_to_move(position) -> int:
+    # Player 1 starts, so player 2 is to move if player 1 has more tiles.
+    return 2 if (position == 1).sum() > (position == 2).sum() else 1
+
+
+def search_nodes(player, position, depth) -> int:
+    # Searches position to a fixed depth and returns number of nodes visited.
+    player.set_id(player_to_move(position))
+    player.max_depth = depth
+    player.find_best_move(BitHexBoard(position), time_limit_seconds=float('inf'))
+    return player.nodes
+
+
+def move_ordering_report(dim=7, depth=4, count=3, seed=0) -> None:
+    # Compares nodes needed for a fixed depth search with and without move ordering.
+    configs = {
+        "unordered": dict(move_ordering=False),
+        "tt+killer+history": dict(),
+        "+static": dict(static_ordering=True),
+    }
+    print("Move ordering, {:d}x{:d} board, depth {:d}".format(dim, dim, depth))
+    print("{:10s}".format("stage") + "".join("{:>20s}".format(name) for name in configs))
+    for stage in STAGES:
+        positions = benchmark_positions(dim, stage, count, seed)
+        row = "{:10s}".format(stage)
+        for options in configs.values():
+            nodes = 0
+            start = time.time()
+            for position in positions:
+                nodes += search_nodes(MinMaxPlayer(dim, tt_size_mb=4, **options), position, depth)
+            row += "{:>20s}".format("{:d} ({:.1f}s)".format(nodes, time.time() - start))
+        print(row)
+
+
+def search_depth_report(dim=11, time_limit=5, count=2, seed=0) -> None:
+    # Compares depth reached within the same time with all legal moves and with candidate moves only.
+    configs = {"full width": dict(candidate_width=None), "candidates": dict()}
+    print("Search depth, {:d}x{:d} board, {:.1f}s per position".format(dim, dim, time_limit))
+    print("{:10s}".format("stage") + "".join("{:>20s}".format(name) for name in configs))
+    for stage in STAGES:
+        positions = benchmark_positions(dim, stage, count, seed)
+        row = "{:10s}".format(stage)
+        for options in configs.values():
+            depths = []
+            for position in positions:
+                player = MinMaxPlayer(dim, tt_size_mb=4, max_depth=dim * dim, **options)
+                player.set_id(player_to_move(position))
+                player.find_best_move(BitHexBoard(position), time_limit_seconds=time_limit)
+                depths.append(player.depth_reached)
+            row += "{:>20s}".format("{:.1f}".format(np.mean(depths)))
+        print(row)
+
+
+def frontier_evaluation_report(dim=11, count=3, seed=0) -> None:
+    # Compares time to evaluate all children of a node one by one and with one evaluate_children call.
+    evaluations = {"components": None, "distance": DistanceEvaluator(), "resistance": ResistanceEvaluator()}
+    print("Evaluation of all children, {:d}x{:d} board, ms per node".format(dim, dim))
+    print("{:10s}{:>14s}{:>14s}{:>14s}".format("stage", "evaluation", "one by one", "batched"))
+    for stage in STAGES:
+        positions = benchmark_positions(dim, stage, count, seed)
+        for name, evaluation in evaluations.items():
+            player = MinMaxPlayer(dim, evaluation=evaluation)
+            scalar = batched = 0
+            for position in positions:
+                player.set_id(player_to_move(position))
+                board = BitHexBoard(position)
+                moves = board.legal_moves()
+                start = time.time()
+                for move in moves:
+                    board.play(move, player.id)
+                    player.evaluate(board)
+                    board.undo()
+                scalar += time.time() - start
+                start = time.time()
+                player.evaluate_children(board, moves, player.id)
+                batched += time.time() - start
+            print("{:10s}{:>14s}{:>14.2f}{:>14.2f}".format(
+                stage, name, 1000 * scalar / count, 1000 * batched / count))
+
+
+def rave_match_report(dim=9, pairs=5, time_limit=1, rave_equivalence=RAVE_EQUIVALENCE, seed=0) -> None:
+    # Plays MCTS with RAVE against plain UCT with the same time per move.
+    # Each opening is played twice with colors reversed, which cancels the advantage of the first move.
+    rave_wins = 0
+    playouts = {"rave": [], "uct": []}
+    openings = [position for position in benchmark_positions(dim, "opening", 2 * pairs, seed)
+                if player_to_move(position) == 1][:pairs]
+    for position in openings:
+        for rave_first in (True, False):
+            rave = MCTSPlayer(dim, time_limit, rave_equivalence=rave_equivalence, verbose=False)
+            uct = MCTSPlayer(dim, time_limit, rave_equivalence=None, verbose=False)
+            players = (rave, uct) if rave_first else (uct, rave)
+            winner = play_game(*players, board=position, allow_swap=False).winner
+            rave_wins += players[winner - 1] is rave
+            playouts["rave"].append(rave.playouts_per_second)
+            playouts["uct"].append(uct.playouts_per_second)
+    print("RAVE (k={:g}) vs UCT, {:d}x{:d} board, {:.1f}s per move: RAVE won {:d} of {:d} games".format(
+        rave_equivalence, dim, dim, time_limit, rave_wins, 2 * len(openings)))
+    print("playouts/s of last move: RAVE {:.0f}, UCT {:.0f}".format(
+        np.mean(playouts["rave"]), np.mean(playouts["uct"])))
+
+
+def parallel_speedup_report(dim=9, depth=4, time_limit=2, count=2, max_workers=None, seed=0) -> None:
+    # Speedup of root splitting (time to a fixed depth, depth within the time limit) and of
+    # root parallel MCTS (playouts/s) per number of workers. All minimax workers share one
+    # transposition table, so its memory is the same for any number of workers.
+    # Workers are started by a first, shallow search, so only the search itself is timed.
+    max_workers = max_workers or os.cpu_count()
+    positions = benchmark_positions(dim, "midgame", count, seed)
+    print("Parallel search, {:d}x{:d} board, {:d} CPUs, {:.1f}s per position".format(
+        dim, dim, os.cpu_count(), time_limit))
+    print("{:>8s}{:>20s}{:>10s}{:>10s}{:>10s}{:>20s}{:>10s}".format(
+        "workers", "minimax depth {:d}".format(depth), "speedup", "depth", "TT MB", "MCTS playouts/s", "speedup"))
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        seconds, depths, rates = [], [], []
+        for position in positions:
+            player = MinMaxPlayer(dim, tt_size_mb=4, max_depth=1, workers=workers)
+            player.set_id(player_to_move(position))
+            player.find_best_move(BitHexBoard(position), time_limit_seconds=float('inf'))
+            player.max_depth = depth
+            start = time.perf_counter()
+            player.find_best_move(BitHexBoard(position), time_limit_seconds=float('inf'))
+            seconds.append(time.perf_counter() - start)
+            player.max_depth = dim * dim
+            player.find_best_move(BitHexBoard(position), time_limit_seconds=time_limit)
+            depths.append(player.depth_reached)
+            tt_size = player.tt.size_mb
+            player.close()
+
+            mcts = MCTSPlayer(dim, workers=workers, verbose=False)
+            mcts.set_id(player_to_move(position))
+            mcts.find_best_move(BitHexBoard(position), 0.1)
+            mcts.find_best_move(BitHexBoard(position), time_limit)
+            rates.append(mcts.playouts_per_second)
+            mcts.close()
+        row = np.mean(seconds), np.mean(rates)
+        baseline = baseline or row
+        print("{:8d}{:>19.2f}s{:>9.2f}x{:>10.1f}{:>10.0f}{:>20.0f}{:>9.2f}x".format(
+            workers, row[0], baseline[0] / row[0], np.mean(depths), tt_size, row[1], row[1] / baseline[1]))
+
+
+# Benchmark suite: fixed positions per size and stage, results as JSON for comparison with a baseline
+SUITE_SIZES = (11, 13, 19)
+SUITE_DEPTHS = {11: 4, 13: 4, 19: 3}  # Fixed minimax depth for time-to-depth
+SUITE_PLAYOUTS = 2000  # MCTS playouts per position
+SUITE_POSITIONS = 3  # Positions per size and stage
+TOLERANCE = 0.1  # Relative change that counts as regression
+HIGHER_IS_BETTER = ("ops/s", "evals/s", "nodes/s", "playouts/s")
+
+
+def measure_rate(function, arguments, min_seconds=0.2) -> float:
+    # Calls function with each tuple of arguments in turn until min_seconds have passed, returns calls per second.
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for args in arguments:
+            function(*args)
+        calls += len(arguments)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls / elapsed
+
+
+def _play_undo(board, move, player) -> None:
+    board.play(move, player)
+    board.undo()
+
+
+def primitive_rates(positions, min_seconds=0.2) -> dict:
+    # Operations per second of the board primitives the search uses, for both board backends.
+    dim = positions[0].shape[0]
+    player = MinMaxPlayer(dim)
+    rates = {}
+    for board_cls in (HexBoard, BitHexBoard):
+        boards = [board_cls(position) for position in positions]
+        operations = {
+            "check_finish": (HexGameForAI.check_finish, [(HexGameForAI(board),) for board in boards]),
+            "calculate_hash": (player.calculate_hash, [(board, player_to_move(position))
+                                                       for board, position in zip(boards, positions)]),
+            "get_legal_moves": (player.get_legal_moves, [(board,) for board in boards]),
+            "play_undo": (_play_undo, [(board, board.legal_moves()[0], player_to_move(position))
+                                       for board, position in zip(boards, positions)]),
+            "copy": (board_cls.copy, [(board,) for board in boards]),
+        }
+        for name, (function, arguments) in operations.items():
+            rates["{} {}".format(board_cls.__name__, name)] = measure_rate(function, arguments, min_seconds)
+    return rates
+
+
+def evaluation_rates(positions, min_seconds=0.2) -> dict:
+    # Static evaluations per second of every evaluator (batched ones count each child).
+    dim = positions[0].shape[0]
+    boards = [BitHexBoard(position) for position in positions]
+    ids = [player_to_move(position) for position in positions]
+    components = MinMaxPlayer(dim)
+    components.set_id(1)
+    evaluators = {
+        "components": (components.evaluate, [(board,) for board in boards]),
+        "dijkstra": (get_heuristic_score, [(board.board, id) for board, id in zip(boards, ids)]),
+        "distance": (DistanceEvaluator(), [(board.board, id) for board, id in zip(boards, ids)]),
+        "resistance": (ResistanceEvaluator(), [(board.board, id) for board, id in zip(boards, ids)]),
+        "ai_player score_map": (AIPlayer().score_map, [(board,) for board in boards]),
+    }
+    rates = {name: measure_rate(function, arguments, min_seconds)
+             for name, (function, arguments) in evaluators.items()}
+
+    for name, evaluation in (("components", None), ("resistance", ResistanceEvaluator())):
+        player = MinMaxPlayer(dim, evaluation=evaluation)
+        player.set_id(1)
+        arguments = [(board, board.legal_moves(), 1) for board in boards]
+        children = np.mean([len(args[1]) for args in arguments])
+        rates[name + " batched"] = children * measure_rate(player.evaluate_children, arguments, min_seconds)
+    return rates
+
+
+def search_measurements(positions) -> dict:
+    # Time to a fixed depth and nodes per second of MinMaxPlayer, playouts per second of MCTSPlayer.
+    dim = positions[0].shape[0]
+    depth = SUITE_DEPTHS.get(dim, 2)
+    seconds = nodes = 0
+    for position in positions:
+        player = MinMaxPlayer(dim, tt_size_mb=4)
+        start = time.perf_counter()
+        nodes += search_nodes(player, position, depth)
+        seconds += time.perf_counter() - start
+
+    playout_seconds = 0
+    for position in positions:
+        mcts = MCTSPlayer(dim, verbose=False)
+        mcts.set_id(player_to_move(position))
+        start = time.perf_counter()
+        mcts.find_best_move(BitHexBoard(position), float('inf'), SUITE_PLAYOUTS)
+        playout_seconds += time.perf_counter() - start
+    return {
+        "MinMaxPlayer time to depth {:d}".format(depth): (seconds / len(positions), "s"),
+        "MinMaxPlayer": (nodes / seconds, "nodes/s"),
+        "MCTSPlayer": (SUITE_PLAYOUTS * len(positions) / playout_seconds, "playouts/s"),
+    }
+
+
+def run_suite(sizes=SUITE_SIZES, count=SUITE_POSITIONS, min_seconds=0.2, seed=0, verbose=True) -> dict:
+    """
+    Runs the benchmark suite on fixed positions of every size and stage.
+
+    Parameters
+    ----------
+    sizes : tuple of ints
+        Board sizes.
+    count : int
+        Positions per size and stage (see benchmark_positions).
+    min_seconds : float
+        Minimum time each rate is measured for.
+    seed : int
+        Seed of the positions, compare only results with the same seed.
+    verbose : bool
+        Whether to print each result when it is measured.
+
+    Returns
+    -------
+    results : dict
+        Metadata and results, result name -> {"value": float, "unit": str}.
+
+    """
+    results = {}
+    for dim in sizes:
+        for stage in STAGES:
+            positions = benchmark_positions(dim, stage, count, seed)
+            measured = {}
+            measured.update({"board " + name: (rate, "ops/s")
+                             for name, rate in primitive_rates(positions, min_seconds).items()})
+            measured.update({"evaluate " + name: (rate, "evals/s")
+                             for name, rate in evaluation_rates(positions, min_seconds).items()})
+            measured.update({"search " + name: value for name, value in search_measurements(positions).items()})
+            for name, (value, unit) in measured.items():
+                key = "{:d}x{:d} {} {}".format(dim, dim, stage, name)
+                results[key] = {"value": value, "unit": unit}
+                if verbose:
+                    print("{:60s}{:>14.5g} {}".format(key, value, unit))
+    meta = {"sizes": list(sizes), "positions": count, "seed": seed, "cpus": os.cpu_count(),
+            "numpy": np.__version__, "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    return {"meta": meta, "results": results}
+
+
+def compare_to_baseline(suite, baseline, tolerance=TOLERANCE) -> list:
+    """
+    Finds results that got worse than the baseline by more than tolerance.
+
+    Rates (ops/s, evals/s, nodes/s, playouts/s) regress when they drop,
+    times (s) when they grow. Results missing in either run are skipped.
+
+    Parameters
+    ----------
+    suite : dict
+        Results of run_suite.
+    baseline : dict
+        Earlier results of run_suite, e.g. loaded from JSON.
+    tolerance : float
+        Allowed relative change.
+
+    Returns
+    -------
+    regressions : list of tuples (str, float, float)
+        Name, baseline value and current value of every regression.
+
+    """
+    regressions = []
+    for name, result in suite["results"].items():
+        if name not in baseline["results"]:
+            continue
+        old, new = baseline["results"][name]["value"], result["value"]
+        if result["unit"] in HIGHER_IS_BETTER:
+            regressed = new < old * (1 - tolerance)
+        else:
+            regressed = new > old * (1 + tolerance)
+        if regressed:
+            regressions.append((name, old, new))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hex engine benchmarks")
+    parser.add_argument("--suite", action="store_true", help="run the benchmark suite instead of the reports")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES, help="board sizes of the suite")
+    parser.add_argument("--save", help="write suite results to this JSON file")
+    parser.add_argument("--baseline", help="compare suite results with this JSON file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="relative change counted as regression")
+    args = parser.parse_args()
+
+    if not args.suite:
+        move_ordering_report()
+        search_depth_report()
+        frontier_evaluation_report()
+        rave_match_report()
+        parallel_speedup_report()
+    else:
+        suite = run_suite(tuple(args.sizes))
+        if args.save:
+            with open(args.save, "w") as file:
+                json.dump(suite, file, indent=1)
+        if args.baseline:
+            with open(args.baseline) as file:
+                regressions = compare_to_baseline(suite, json.load(file), args.tolerance)
+            for name, old, new in regressions:
+                print("REGRESSION {}: {:.5g} -> {:.5g} ({:+.0%})".format(name, old, new, new / old - 1))
+            print("{:d} regressions beyond {:.0%}".format(len(regressions), args.tolerance))
+            sys.exit(1 if regressions else 0)
@@ -0,0 +1,200 @@
+import numpy as np
+
+from board_geometry import get_geometry
+from hexgame import HexBoard
+
+
+class BitHexBoard(HexBoard):
+    def __init__(self, board):
+        """
+    Save initial board provided by user as one bitmask per player.
+
+    Drop-in replacement for HexBoard: dim/get_tile/set_tile/swap/get_row/
+    get_col/get_neighbors behave the same, while legal move generation,
+    connectivity tests and position keys are a few big-integer operations.
+
+    Instead of union-find forests, the board keeps per player the mask of
+    own tiles connected to the start edge. A move only grows it (by a flood
+    fill through the own tiles it touches), undo restores the previous
+    mask, and the winner is the player whose mask reaches the end edge.
+
+    Parameters
+    ----------
+    board : numpy array
+        Matrix representation of board.
+
+    """
+        self._load(np.asarray(board).astype(int))
+        self._reset_state()
+
+    def _load(self, board):
+        rows, cols = board.shape
+        self._geometry = get_geometry(rows, cols)
+        flat = board.ravel()
+        self._stones = [0, 0, 0]
+        for player in (1, 2):
+            for idx in np.flatnonzero(flat == player):
+                self._stones[player] |= 1 << int(idx)
+
+    @property
+    def board(self) -> np.ndarray:
+        # Matrix representation of board (newly created, writing to it does not change the board).
+        g = self._geometry
+        board = np.zeros((g.rows, g.cols), dtype=int)
+        for player in (1, 2):
+            board[g.unpack(self._stones[player])] = player
+        return board
+
+    def dim(self) -> tuple:
+        # Returns dimension of board (x-direction, y-direction)
+        return self._geometry.cols, self._geometry.rows
+
+    def _swap_tiles(self) -> None:
+        board = self.board
+        ones = (board == 1)
+        twos = (board == 2)
+        board[ones], board[twos] = 2, 1
+        self._load(board.transpose())
+
+    def _build_state(self) -> None:
+        # Empty tiles and, per player, the own tiles connected to the start edge.
+        g = self._geometry
+        self._empty = g.full & ~(self._stones[1] | self._stones[2])
+        self._reached = [0] + [g.grow(self._stones[player] & g.edges(player)[0], self._stones[player])
+                               for player in (1, 2)]
+
+    def _record(self, idx, val) -> None:
+        # Updates incremental state after tile idx was set and remembers how to undo it.
+        g = self._geometry
+        bit = 1 << idx
+        reached = self._reached[val]
+        if g.neighbor_masks[idx] & reached or g.edges(val)[0] & bit:
+            # Tiles only connected via already reached ones are reached anyway
+            self._reached[val] = reached | g.grow(bit, self._stones[val] & ~reached)
+        self._empty &= ~bit
+        self._hash ^= g.zobrist[val][idx]
+        self._swap_hash ^= g.zobrist_swapped[val][idx]
+        self._history.append((idx, val, reached))
+
+    def swap(self) -> None:
+        # Performs a swap in Hex game by swapping colors and mirroring the board.
+        previous = self._empty, self._reached
+        self._swap_tiles()
+        self._build_state()
+        self._hash, self._swap_hash = self._swap_hash, self._hash
+        self._history.append((None, None, previous))
+
+    def undo(self):
+        # Takes back the last set_tile/play (or swap), see HexBoard.undo.
+        idx, val, state = self._history.pop()
+        if idx is None:
+            self._swap_tiles()
+            self._empty, self._reached = state
+            self._hash, self._swap_hash = self._swap_hash, self._hash
+            return None
+        g = self._geometry
+        self._reached[val] = state
+        self._empty |= 1 << idx
+        self._hash ^= g.zobrist[val][idx]
+        self._swap_hash ^= g.zobrist_swapped[val][idx]
+        self._clear_tile(idx)
+        return g.cells[idx]
+
+    def _clear_tile(self, idx) -> None:
+        mask = ~(1 << idx)
+        self._stones[1] &= mask
+        self._stones[2] &= mask
+
+    def copy(self):
+        # Returns independent copy of the board (move history is not copied).
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other._stones = list(self._stones)
+        other._reached = list(self._reached)
+        other._history = []
+        return other
+
+    def legal_moves(self) -> list:
+        # Returns all empty tiles (i, j) in row-major order.
+        # Scanning the binary string is faster than bit tricks for the mostly empty boards of a search.
+        cells = self._geometry.cells
+        return [cells[idx] for idx, bit in enumerate(bin(self._empty)[:1:-1]) if bit == "1"]
+
+    def is_connected(self, player) -> bool:
+        # Checks whether player connects both of his edges.
+        return bool(self._reached[player] & self._geometry.edges(player)[1])
+
+    def winner(self) -> int:
+        # Returns id of player who has won, 0 if game goes on.
+        g = self._geometry
+        if self._reached[1] & g.bottom:
+            return 1
+        if self._reached[2] & g.right:
+            return 2
+        return 0
+
+    def get_tile(self, i, j) -> int:
+        # Returns value of tile (i,j)
+        bit = 1 << (i * self._geometry.cols + j)
+        if self._stones[1] & bit:
+            return 1
+        if self._stones[2] & bit:
+            return 2
+        return 0
+
+    def set_tile(self, i, j, val) -> bool:
+        # Sets value of tile (i,j).
+        # Returns true if tile was not already occupied, otherwise returns False.
+
+        # Check if tile indices are valid (not out of bounds)
+        g = self._geometry
+        if i < 0 or j < 0 or i >= g.rows or j >= g.cols:
+            return False
+
+        # Check if tile can be set
+        idx = i * g.cols + j
+        bit = 1 << idx
+        if (self._stones[1] | self._stones[2]) & bit:
+            return False
+        self._stones[val] |= bit
+        self._record(idx, val)
+        return True
+
+    def get_row(self, i):
+        # Returns ith row of the board if i is valid index, otherwise None.
+        if 0 <= i < self._geometry.rows:
+            return self.board[i, :]
+        return None
+
+    def get_col(self, j):
+        # Returns jth column of the board if i is valid index, otherwise None.
+        if 0 <= j < self._geometry.cols:
+            return self.board[:, j]
+        return None
+
+    def get_neighbors(self, i, j):
+        # Returns list of neighboring positions of (i, j), see HexBoard.get_neighbors.
+        return list(self._geometry.neighbors[i * self._geometry.cols + j])
+
+    def stones(self, player) -> int:
+        # Returns bitmask of all tiles occupied by player.
+        return self._stones[player]
+
+    def key(self) -> tuple:
+        # Returns exact (hashable) key of the position.
+        return self._stones[1], self._stones[2]
+
+    def connects(self, player) -> bool:
+        # Checks whether player connects both edges by growing the start edge through the own tiles.
+        # Unlike is_connected this needs no connectivity state, e.g. for boards filled by bit operations.
+        return self._geometry.connects(self._stones[player], player)
+
+    def count_components(self, player) -> int:
+        # Returns number of connected groups of tiles of player.
+        g = self._geometry
+        remaining = self._stones[player]
+        components = 0
+        while remaining:
+            remaining &= ~g.grow(remaining & -remaining, remaining)
+            components += 1
+        return components
@@ -0,0 +1,136 @@
+import random
+
+import numpy as np
+
+
+class BoardGeometry:
+    def __init__(self, rows, cols):
+        """
+        Precomputes neighbor tables and masks of a (rows x cols) board.
+
+        Cell (i, j) has flat index i * cols + j, which is also its bit in
+        the bitmasks used by BitHexBoard.
+
+        Parameters
+        ----------
+        rows : int
+            Number of rows of the board.
+        cols : int
+            Number of columns of the board.
+
+        """
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+        self.cells = [divmod(idx, cols) for idx in range(self.size)]  # (i, j) of every flat index
+
+        # Zobrist keys of the position itself and of the position after a swap,
+        # where tile (i, j) of player p becomes tile (j, i) of player 3 - p.
+        self.zobrist = zobrist_keys(rows, cols)
+        transposed = zobrist_keys(cols, rows)
+        self.zobrist_swapped = [None] + [
+            [transposed[3 - player][j * rows + i] for i in range(rows) for j in range(cols)]
+            for player in (1, 2)]
+
+        first_col = sum(1 << (i * cols) for i in range(rows))
+        last_col = first_col << (cols - 1)
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~last_col
+
+        # Edges of player 1 (top -> bottom) and player 2 (left -> right)
+        self.top = (1 << cols) - 1
+        self.bottom = self.top << ((rows - 1) * cols)
+        self.left = first_col
+        self.right = last_col
+
+        # Same order as HexBoard.get_neighbors
+        directions = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, 1), (1, -1)]
+        # Bridge partners: tiles at distance two sharing two common neighbors
+        bridges = [(-2, 1), (-1, 2), (1, 1), (2, -1), (1, -2), (-1, -1)]
+        self.neighbors = []
+        self.neighbor_ids = []
+        self.neighbor_masks = []
+        self.bridge_masks = []
+        for i in range(rows):
+            for j in range(cols):
+                cells = [(i + di, j + dj) for di, dj in directions
+                         if 0 <= i + di < rows and 0 <= j + dj < cols]
+                self.neighbors.append(cells)
+                self.neighbor_ids.append([k * cols + l for k, l in cells])
+                self.neighbor_masks.append(sum(1 << (k * cols + l) for k, l in cells))
+                self.bridge_masks.append(sum(1 << ((i + di) * cols + j + dj) for di, dj in bridges
+                                             if 0 <= i + di < rows and 0 <= j + dj < cols))
+
+    def dilate(self, mask) -> int:
+        # Returns mask grown by all six hex neighbors (shifts across row borders are masked out).
+        cols = self.cols
+        return (mask
+                | ((mask << 1) & self.not_first_col) | ((mask >> 1) & self.not_last_col)
+                | (mask << cols) | (mask >> cols)
+                | ((mask >> (cols - 1)) & self.not_first_col)
+                | ((mask << (cols - 1)) & self.not_last_col)) & self.full
+
+    def unpack(self, mask) -> np.ndarray:
+        # Returns mask as boolean (rows x cols) matrix.
+        n_bytes = (self.size + 7) // 8
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes(n_bytes, "little"), dtype=np.uint8),
+                             bitorder="little")[:self.size]
+        return bits.astype(bool).reshape(self.rows, self.cols)
+
+    def grow(self, seed, own) -> int:
+        # Returns all tiles of own connected to the tiles of seed (seed must be part of own).
+        group = seed
+        while True:
+            grown = self.dilate(group) & own
+            if grown == group:
+                return group
+            group = grown
+
+    def connects(self, own, player) -> bool:
+        # Checks whether tiles own connect both edges of player by growing the start edge through them.
+        start, end = self.edges(player)
+        reach = own & start
+        while reach and not reach & end:
+            grown = self.dilate(reach) & own
+            if grown == reach:
+                return False
+            reach = grown
+        return bool(reach)
+
+    def edges(self, player) -> tuple:
+        # Returns (start, end) edge masks of given player.
+        if player == 1:
+            return self.top, self.bottom
+        return self.left, self.right
+
+
+_GEOMETRIES = {}
+_ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(rows, cols) -> list:
+    # Returns 64-bit Zobrist keys keys[player][i * cols + j] for a (rows x cols) board.
+    # Keys are seeded by the board size, so they are the same in every process.
+    keys = _ZOBRIST_KEYS.get((rows, cols))
+    if keys is None:
+        rng = random.Random(rows * 1000 + cols)
+        keys = [None] + [[rng.getrandbits(64) for _ in range(rows * cols)] for _ in (1, 2)]
+        _ZOBRIST_KEYS[(rows, cols)] = keys
+    return keys
+
+
+def get_geometry(rows, cols) -> BoardGeometry:
+    # Geometries only depend on the board size, so they are shared by all boards of that size.
+    geometry = _GEOMETRIES.get((rows, cols))
+    if geometry is None:
+        geometry = _GEOMETRIES[(rows, cols)] = BoardGeometry(rows, cols)
+    return geometry
+
+
+def iter_bits(mask):
+    # Yields indices of all set bits of mask in ascending order.
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
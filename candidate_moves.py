@@ -0,0 +1,126 @@
+from ai_player_improved import Graph
+from board_geometry import get_geometry, iter_bits
+
+# Weights of the features a candidate move is ranked by
+NEIGHBOR_WEIGHT = 2  # per occupied neighboring tile
+BRIDGE_WEIGHT = 2  # tile forms a bridge with an existing tile
+CENTER_WEIGHT = 2  # central tile of a (nearly) empty board
+PATH_WEIGHT = 1  # tile lies on a shortest path of either player (only breaks ties, paths are arbitrary)
+
+CENTER_RADIUS = 2  # central tiles are at most this many steps from the middle
+NEAR_EMPTY = 2  # central tiles are candidates as long as at most this many tiles are occupied
+
+
+class CandidateGenerator:
+    def __init__(self, width=12, terminal_distance=2, use_paths=True):
+        """
+        Selects a small ranked subset of the legal moves.
+
+        Strong Hex moves are almost always next to existing tiles or on
+        bridge points of existing tiles, and in the opening in the middle of
+        the board. These local moves are ranked first; tiles on a shortest
+        path of either player are candidates as well, but a path is only
+        one of many, so it merely breaks ties. Only the best ranked tiles
+        are returned, unless the position is close to the end of the game.
+
+        Parameters
+        ----------
+        width : int
+            Maximum number of moves returned.
+        terminal_distance : int
+            All legal moves are returned if a player needs at most this
+            many more tiles to connect its edges.
+        use_paths : bool
+            Whether to compute shortest paths (ai_player_improved.Graph)
+            for ranking and for detecting positions close to the end.
+
+        """
+        self.width = width
+        self.terminal_distance = terminal_distance
+        self.use_paths = use_paths
+
+    def generate(self, board, width=None, use_paths=None) -> list:
+        """
+        Returns ranked candidate moves.
+
+        Parameters
+        ----------
+        board : BitHexBoard
+            Current state of the Hex board.
+        width : int, optional
+            Overrides the maximum number of moves for this call.
+        use_paths : bool, optional
+            Overrides whether shortest paths are computed for this call.
+
+        Returns
+        -------
+        moves : list of tuples (int, int)
+            Candidate moves, best ranked first.
+
+        """
+        width = width or self.width
+        use_paths = self.use_paths if use_paths is None else use_paths
+        x_dim, y_dim = board.dim()
+        g = get_geometry(y_dim, x_dim)
+        empty = board.empty_mask()
+        if bin(empty).count("1") <= width:
+            return board.legal_moves()
+
+        on_path = 0
+        if use_paths:
+            for player in (1, 2):
+                distance, path = Graph(board.board, player).shortest_path()
+                if distance <= self.terminal_distance:
+                    # Close to the end every blocking move matters, fall back to full width
+                    return board.legal_moves()
+                for (i, j) in path:
+                    on_path |= 1 << (i * x_dim + j)
+        on_path &= empty
+
+        occupied = g.full & ~empty
+        bridges = 0
+        for idx in iter_bits(occupied):
+            bridges |= g.bridge_masks[idx]
+        bridges &= empty
+        central = 0
+        if bin(occupied).count("1") <= NEAR_EMPTY:
+            central = 1 << ((y_dim // 2) * x_dim + x_dim // 2)
+            for _ in range(CENTER_RADIUS):
+                central = g.dilate(central)
+            central &= empty
+        candidates = (g.dilate(occupied) | bridges | central | on_path) & empty
+        if not candidates:
+            return board.legal_moves()
+
+        center = ((y_dim - 1) / 2, (x_dim - 1) / 2)
+
+        def rank(idx):
+            i, j = divmod(idx, x_dim)
+            score = (NEIGHBOR_WEIGHT * bin(g.neighbor_masks[idx] & occupied).count("1")
+                     + BRIDGE_WEIGHT * (bridges >> idx & 1) + CENTER_WEIGHT * (central >> idx & 1)
+                     + PATH_WEIGHT * (on_path >> idx & 1))
+            return score, -abs(i - center[0]) - abs(j - center[1])
+
+        ranked = sorted(iter_bits(candidates), key=rank, reverse=True)[:width]
+        return [divmod(idx, x_dim) for idx in ranked]
+
+
+if __name__ == "__main__":
+    # Sanity check: in the opening the best ranked candidates are central or next to the tiles
+    import numpy as np
+    from bitboard import BitHexBoard
+
+    dim = 11
+    generator = CandidateGenerator()
+    empty_board = np.zeros((dim, dim), dtype=int)
+    moves = generator.generate(BitHexBoard(empty_board))
+    print("Empty board:", moves)
+    assert all(max(abs(i - dim // 2), abs(j - dim // 2), abs(i + j - 2 * (dim // 2))) <= CENTER_RADIUS
+               for i, j in moves[:6]), "opening candidates are not central"
+
+    lone = empty_board.copy()
+    lone[5, 5] = 1
+    moves = generator.generate(BitHexBoard(lone))
+    print("Stone at (5, 5):", moves)
+    assert all(max(abs(i - 5), abs(j - 5), abs(i + j - 10)) <= 2 for i, j in moves), "candidates are not local"
+    assert {(5, 4), (5, 6), (4, 5), (6, 5), (4, 6), (6, 4)} <= set(moves), "neighbors are missing"
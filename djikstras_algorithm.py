@@ -1,3 +1,9 @@
+import heapq
+from functools import lru_cache
+
+from board_geometry import get_geometry
+
+
 class HexValue:
     computer = "computer"
     player = "player"
@@ -9,6 +15,15 @@ class Position:
         self.x = x
         self.y = y
 
+    def __eq__(self, other):
+        return isinstance(other, Position) and (self.x, self.y) == (other.x, other.y)
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return "Position({:d}, {:d})".format(self.x, self.y)
+
 
 class Path:
     def __init__(self, from_hex, to_hex, path_hexes, distance):
@@ -18,145 +33,171 @@ class Path:
         self.distance = distance
 
 
-class Hex:
-    def __init__(self, position, value, board=None, outside=False):
-        self.position = position
-        self.value = value
-        self.board = board
-        self.outside = outside
-        self.path_length_from_start = float('inf')
-        self.path_vertices_from_start = []
-
-    def clear_vertex_cache(self):
-        self.path_length_from_start = float('inf')
-        self.path_vertices_from_start = []
-
-    @property
-    def neighbors(self):
-        if self.board is None:
-            return []
-        return list(set(self.board.get_neighbors_for(self)))
-
-
 class Graph:
-    def __init__(self, hexes):
-        self.vertices = set(hexes)
-
-    def get_shortest_path_from(self, hex_obj, destination_hex, perspective):
-        if hex_obj.value == perspective:
-            self.find_shortest_paths_using_dijkstra(hex_obj, perspective)
-            path = Path(hex_obj, destination_hex, destination_hex.path_vertices_from_start, destination_hex.path_length_from_start)
-            return path
-        return None
-
-    def find_shortest_paths_using_dijkstra(self, start_vertex, perspective):
-        for vertex in self.vertices:
-            vertex.clear_vertex_cache()
-
-        current_vertices = set(self.vertices)
-        start_vertex.path_length_from_start = 0
-        start_vertex.path_vertices_from_start.append(start_vertex)
-
-        current_vertex = start_vertex
-
-        while current_vertex:
-            current_vertices.remove(current_vertex)
-            not_checked_neighbors = [neighbor for neighbor in current_vertex.neighbors if neighbor in current_vertices]
-            filtered_neighbors = [neighbor for neighbor in not_checked_neighbors if neighbor.value == HexValue.undefined or neighbor.value == perspective]
-
-            for neighbor_vertex in filtered_neighbors:
-                weight = 0.0 if neighbor_vertex.value == perspective else 1.0
-                theoretic_new_weight = current_vertex.path_length_from_start + weight
-
-                if theoretic_new_weight < neighbor_vertex.path_length_from_start:
-                    neighbor_vertex.path_length_from_start = theoretic_new_weight
-                    neighbor_vertex.path_vertices_from_start = list(current_vertex.path_vertices_from_start)
-                    neighbor_vertex.path_vertices_from_start.append(neighbor_vertex)
-
-            if not current_vertices:
-                return
-            else:
-                current_vertex = min(current_vertices, key=lambda vertex: vertex.path_length_from_start)
-
-
-def get_player_shortest_path(graph, outside_left_hex_position, outside_right_hex_position):
-    graph_instance = Graph()
-
-    hex_graph = graph_instance if graph_instance else None
-    from_hex = get_hex_for_position(outside_left_hex_position) if outside_left_hex_position else None
-    to_hex = get_hex_for_position(outside_right_hex_position) if outside_right_hex_position else None
-
-    if hex_graph and from_hex and to_hex:
-        return hex_graph.get_shortest_path_from(from_hex, to_hex, perspective="player")
-
-    return None
-
-
-def get_computer_shortest_path(graph, outside_down_hex_position, outside_top_hex_position):
-    graph_instance = Graph()
-
-    hex_graph = graph_instance if graph_instance else None
-    from_hex = get_hex_for_position(outside_down_hex_position) if outside_down_hex_position else None
-    to_hex = get_hex_for_position(outside_top_hex_position) if outside_top_hex_position else None
-
-    if hex_graph and from_hex and to_hex:
-        return hex_graph.get_shortest_path_from(from_hex, to_hex, perspective="computer")
-
-    return None
-
-
-def get_neighbor_positions(position, hexes, outside_left_hex_position, outside_right_hex_position,
-                            outside_top_hex_position, outside_down_hex_position):
-    if position == outside_left_hex_position:
-        return [hex_obj.position for hex_obj in hexes if hex_obj.position.x == 0]
-    elif position == outside_right_hex_position:
-        return [hex_obj.position for hex_obj in hexes if hex_obj.position.x == 5]
-    elif position == outside_top_hex_position:
-        return [hex_obj.position for hex_obj in hexes if hex_obj.position.y == 5]
-    elif position == outside_down_hex_position:
-        return [hex_obj.position for hex_obj in hexes if hex_obj.position.y == 0 and hex_obj.position.x <= 5]
-    else:
-        positions = [
-            Position(position.x, position.y + 1),
-            Position(position.x + 1, position.y),
-            Position(position.x + 1, position.y - 1),
-            Position(position.x, position.y - 1),
-            Position(position.x - 1, position.y),
-            Position(position.x - 1, position.y + 1),
-        ]
-
-        if position.x == 0:
-            positions.append(outside_left_hex_position)
-        if position.x == 5:
-            positions.append(outside_right_hex_position)
-        if position.y == 5:
-            positions.append(outside_top_hex_position)
-        if position.y == 0 and position.x <= 5:
-            positions.append(outside_down_hex_position)
-
-        return positions
-
-
-def get_score_for_path(path, value):
+    def __init__(self, rows, cols):
+        """
+        Hex board as a graph with flat integer vertex ids.
+
+        Tile (i, j) is vertex i * cols + j (the same index as the bitboards),
+        Position(x=j, y=i). Four virtual "outside" vertices stand for the
+        board edges: player 1 connects outside_top with outside_down, player 2
+        connects outside_left with outside_right. Adjacency is computed once
+        per board size (see get_graph).
+
+        Parameters
+        ----------
+        rows : int
+            Number of rows of the board.
+        cols : int
+            Number of columns of the board.
+
+        """
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.outside_top = self.size
+        self.outside_down = self.size + 1
+        self.outside_left = self.size + 2
+        self.outside_right = self.size + 3
+
+        adjacency = [list(ids) for ids in get_geometry(rows, cols).neighbor_ids]
+        top = [j for j in range(cols)]
+        down = [(rows - 1) * cols + j for j in range(cols)]
+        left = [i * cols for i in range(rows)]
+        right = [i * cols + cols - 1 for i in range(rows)]
+        for edge, tiles in ((self.outside_top, top), (self.outside_down, down),
+                            (self.outside_left, left), (self.outside_right, right)):
+            for idx in tiles:
+                adjacency[idx].append(edge)
+        adjacency += [top, down, left, right]
+        self.adjacency = [tuple(ids) for ids in adjacency]
+
+    def edges(self, player_id) -> tuple:
+        # Returns (start, end) outside vertices of player.
+        if player_id == 1:
+            return self.outside_top, self.outside_down
+        return self.outside_left, self.outside_right
+
+    def position(self, vertex) -> Position:
+        i, j = divmod(vertex, self.cols)
+        return Position(j, i)
+
+    def find_shortest_path(self, values, player_id) -> Path:
+        """
+        Dijkstra from the player's start edge to the end edge.
+
+        Entering an own tile costs 0, an empty tile 1, opponent tiles are
+        blocked. Paths are kept as predecessor ids and only built for the
+        destination.
+
+        Parameters
+        ----------
+        values : sequence of int
+            Tile values (0, 1, 2) by vertex id, e.g. board.ravel().
+        player_id : int
+            Player the path is searched for.
+
+        Returns
+        -------
+        path : Path
+            Shortest path, distance is the number of empty tiles on it
+            (inf and no tiles if the player is blocked).
+
+        """
+        start, end = self.edges(player_id)
+        opponent = 3 - player_id
+        n = self.size
+        adjacency = self.adjacency
+
+        dist = [float('inf')] * (n + 4)
+        pred = [-1] * (n + 4)
+        dist[start] = 0
+        heap = [(0, start)]
+        while heap:
+            d, vertex = heapq.heappop(heap)
+            if d > dist[vertex]:
+                continue  # outdated heap entry
+            if vertex == end:
+                break
+            for neighbor in adjacency[vertex]:
+                if neighbor >= n:
+                    if neighbor != end:
+                        continue  # outside vertices of the other player or the start
+                    weight = 0
+                else:
+                    value = values[neighbor]
+                    if value == opponent:
+                        continue
+                    weight = 0 if value == player_id else 1
+                if d + weight < dist[neighbor]:
+                    dist[neighbor] = d + weight
+                    pred[neighbor] = vertex
+                    heapq.heappush(heap, (d + weight, neighbor))
+
+        path_hexes = []
+        vertex = pred[end]
+        while vertex >= 0 and vertex != start:
+            path_hexes.append(self.position(vertex))
+            vertex = pred[vertex]
+        path_hexes.reverse()
+        return Path(start, end, path_hexes, dist[end])
+
+
+@lru_cache(maxsize=None)
+def get_graph(rows, cols) -> Graph:
+    # Graphs only depend on the board size, so they are built once and shared.
+    return Graph(rows, cols)
+
+
+def _tile_values(board) -> tuple:
+    # Accepts a HexBoard or its numpy matrix, returns (graph, flat tile values).
+    board = getattr(board, "board", board)
+    rows, cols = board.shape
+    return get_graph(rows, cols), board.ravel().tolist()
+
+
+def get_player_shortest_path(board, computer_id) -> Path:
+    # Shortest path of the opponent of computer_id.
+    graph, values = _tile_values(board)
+    return graph.find_shortest_path(values, 3 - computer_id)
+
+
+def get_computer_shortest_path(board, computer_id) -> Path:
+    # Shortest path of computer_id.
+    graph, values = _tile_values(board)
+    return graph.find_shortest_path(values, computer_id)
+
+
+def get_score_for_path(path):
     if path and path.distance == 0.0:
         return float('-inf')  # Game over
     else:
-        return float(len([hex_value for hex_value in path.path_hexes if hex_value == HexValue.undefined]))
+        return float(path.distance)  # number of empty tiles still needed
+
+
+def get_heuristic_score(board, computer_id) -> float:
+    """
+    Shortest path heuristic: tiles the opponent still needs minus tiles
+    the computer still needs.
 
-# Till here
-def get_heuristic_score():
-    def get_computer_shortest_path():
-        # Implement the logic to get the computer's shortest path
-        pass
+    Parameters
+    ----------
+    board : HexBoard or numpy array
+        Current state of the Hex board.
+    computer_id : int
+        Player the score is computed for (positive is good for this player).
 
-    def get_player_shortest_path():
-        # Implement the logic to get the player's shortest path
-        pass
+    Returns
+    -------
+    score : float
+        inf if computer_id has connected its edges, -inf if the opponent has.
 
-    computer_path = get_computer_shortest_path()
-    player_path = get_player_shortest_path()
+    """
+    graph, values = _tile_values(board)
+    computer_path = graph.find_shortest_path(values, computer_id)
+    player_path = graph.find_shortest_path(values, 3 - computer_id)
 
-    computer_score = get_score_for_path(computer_path, HexValue.computer)
-    player_score = get_score_for_path(player_path, HexValue.player)
+    computer_score = get_score_for_path(computer_path)
+    player_score = get_score_for_path(player_path)
 
     return player_score - computer_score
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+
+PRIOR_GAMES = 1  # Virtual wins of each side of every pairing (like BayesElo's virtual draws), keeps ratings finite
+Z_95 = 1.959964  # Half-width of a 95% confidence interval in standard errors
+
+
+def expected_score(elo_difference) -> float:
+    # Expected score of a player rated elo_difference above the opponent.
+    return 1 / (1 + 10 ** (-elo_difference / 400))
+
+
+def elo_difference(score) -> float:
+    # Elo difference corresponding to an expected score strictly between 0 and 1.
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_ratings(wins, prior=PRIOR_GAMES, tolerance=1e-9, max_iterations=10000) -> tuple:
+    """
+    Maximum likelihood ratings of all players from their pairwise results.
+
+    Fits the Bradley-Terry model (the logistic model behind Elo, Hex has
+    no draws) with the MM algorithm of Hunter (2004). Every pairing that
+    was played gets prior virtual wins for both sides, so a player that won
+    all its games still gets a finite rating.
+
+    Parameters
+    ----------
+    wins : numpy array
+        wins[i, j] is the number of games player i won against player j.
+    prior : float
+        Virtual wins added to both sides of every pairing that was played.
+    tolerance : float
+        Iteration stops when no rating changes by more than this (in Elo).
+    max_iterations : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    ratings : numpy array
+        Elo rating of each player, mean 0.
+    errors : numpy array
+        Half-width of the 95% confidence interval of each rating
+        (inf for players without games).
+
+    """
+    wins = np.asarray(wins, dtype=float)
+    played = (wins + wins.T) > 0
+    wins = wins + prior * played
+    games = wins + wins.T
+    total_wins = wins.sum(axis=1)
+    active = games.sum(axis=1) > 0
+
+    gamma = np.ones(len(wins))
+    for _ in range(max_iterations):
+        pair = games / (gamma[:, np.newaxis] + gamma[np.newaxis, :])
+        updated = np.where(active, total_wins / np.where(active, pair.sum(axis=1), 1), 1.0)
+        updated /= np.exp(np.log(updated[active]).mean()) if active.any() else 1.0
+        converged = np.abs(np.log(updated / gamma)).max() * 400 / math.log(10) < tolerance
+        gamma = updated
+        if converged:
+            break
+
+    # Standard errors from the inverse Fisher information (pseudo-inverse, ratings are only
+    # determined up to a common offset)
+    probability = gamma[:, np.newaxis] / (gamma[:, np.newaxis] + gamma[np.newaxis, :])
+    information = -games * probability * probability.T
+    information[np.diag_indices_from(information)] = -information.sum(axis=1)
+    covariance = np.linalg.pinv(information)
+    scale = 400 / math.log(10)
+    ratings = scale * np.log(gamma)
+    errors = np.where(active, Z_95 * scale * np.sqrt(np.maximum(np.diag(covariance), 0)), np.inf)
+    return ratings - ratings[active].mean() if active.any() else ratings, errors
@@ -0,0 +1,145 @@
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from bitboard import BitHexBoard
+from hexgame import HexGame
+
+
+class GameResult:
+    def __init__(self, winner, moves, move_times, swapped, stats=None):
+        """
+        Outcome of a game played without GUI.
+
+        Parameters
+        ----------
+        winner : int
+            Color (1 or 2) that connected its edges.
+        moves : list of tuples (int, tuple)
+            Per turn: color of the player to move and the chosen tile (i, j),
+            None for a claimed swap.
+        move_times : list of floats
+            Seconds each player needed for the turns in moves.
+        swapped : bool
+            Whether the swap was claimed.
+        stats : list of dicts, optional
+            Per turn: SearchStats.to_dict of the player's search, None for
+            players without statistics and for a claimed swap.
+
+        """
+        self.winner = winner
+        self.moves = moves
+        self.move_times = move_times
+        self.swapped = swapped
+        self.stats = stats if stats is not None else [None] * len(moves)
+
+    def total_time(self, player) -> float:
+        # Seconds spent by the player with the given color.
+        return sum(seconds for (color, _), seconds in zip(self.moves, self.move_times) if color == player)
+
+    def to_dict(self) -> dict:
+        # Plain representation, e.g. for JSON.
+        return {
+            "winner": self.winner,
+            "moves": [[color, list(tile) if tile is not None else None] for color, tile in self.moves],
+            "move_times": self.move_times,
+            "swapped": self.swapped,
+            "stats": self.stats,
+        }
+
+
+def play_game(player1, player2, board=None, dimension=11, board_cls=BitHexBoard, allow_swap=True) -> GameResult:
+    """
+    Plays one game without GUI.
+
+    Same rules as HexApp: the player to move at the second turn may claim
+    the swap, then turns alternate until check_finish reports a winner.
+    Players must not be interactive (e.g. no HumanPlayer). Background
+    searches of both players (pondering) are stopped when the game ends.
+
+    Parameters
+    ----------
+    player1 : BasePlayer
+        Player 1 (connects top to bottom).
+    player2 : BasePlayer
+        Player 2 (connects left to right).
+    board : numpy array, optional
+        Start position (None: empty board of size dimension). Player 1
+        moves first unless player 2's tiles are fewer.
+    dimension : int
+        Size of the empty board.
+    board_cls : type
+        Board backend, HexBoard or a drop-in replacement.
+    allow_swap : bool
+        Whether to ask for the swap at the second turn.
+
+    Returns
+    -------
+    result : GameResult
+        Winner, moves, time and search statistics per move.
+
+    """
+    if board is None:
+        board = np.zeros((dimension, dimension), dtype=int)
+    game = HexGame(board, player1, player2, board_cls)
+    game.set_turn(1 + (board != 0).sum())
+    if (board == 1).sum() > (board == 2).sum():
+        game.switch_player()
+
+    moves = []
+    move_times = []
+    stats = []
+    swapped = False
+    try:
+        while game.check_finish() == 0:
+            color = game.get_player()
+            player = game.players[color - 1]
+            if allow_swap and game.wait_for_swap() and not swapped:
+                start = time.perf_counter()
+                swapped = bool(game.swap())
+                if swapped:
+                    moves.append((color, None))
+                    move_times.append(time.perf_counter() - start)
+                    stats.append(None)
+                    continue
+
+            start = time.perf_counter()
+            player.last_stats = None
+            move = player.choose_tile(game.board)
+            if isinstance(move, Future):
+                move = move.result()
+            seconds = time.perf_counter() - start
+            (i, j) = (int(move[0]), int(move[1]))
+            if not game.play(i, j):
+                raise ValueError("Player {:d} chose tile ({:d}, {:d}), which is not available".format(
+                    color, i, j))
+            moves.append((color, (i, j)))
+            move_times.append(seconds)
+            stats.append(player.last_stats.to_dict() if player.last_stats is not None else None)
+    finally:
+        # Background searches (e.g. pondering) must not go on into the next game
+        for player in game.players:
+            player.stop_search()
+            player.stop_pondering()
+
+    return GameResult(game.check_finish(), moves, move_times, swapped, stats)
+
+
+def play_games(player1, player2, games, dimension=11, board_cls=BitHexBoard, allow_swap=True) -> list:
+    # Plays games with the same two players (and colors) one after another.
+    return [play_game(player1, player2, dimension=dimension, board_cls=board_cls, allow_swap=allow_swap)
+            for _ in range(games)]
+
+
+if __name__ == "__main__":
+    from ai_player import AIPlayer
+    from random_player import RandomPlayer
+
+    games = 1000
+    start = time.perf_counter()
+    results = play_games(AIPlayer(), RandomPlayer(think_time=0), games)
+    seconds = time.perf_counter() - start
+    wins = sum(result.winner == 1 for result in results)
+    print("AIPlayer won {:d} of {:d} games against RandomPlayer in {:.1f}s ({:.1f} games/s)".format(
+        wins, games, seconds, games / seconds))
@@ -1,16 +1,19 @@
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from math import sin, cos, pi
 import time
 
 import pygame
 
-from hexgame import HexGame, PuzzleHexGame
+from hexgame import HexBoard, HexGame, PuzzleHexGame
 from hexglobals import PLAYER_COLORS, BACKGROUND_COLOR, BORDER_COLOR, EMPTY_TILE_COLOR
 from puzzle_player import PuzzlePlayer
 
+FRAMES_PER_SECOND = 30  # The event loop sleeps between frames instead of polling continuously
+
 
 class HexApp:
-    def __init__(self, board, player1, player2, px=800, py=800):
+    def __init__(self, board, player1, player2, px=800, py=800, board_cls=HexBoard, move_timeout=None):
         self._running = None
         self.mouse_x = None
         self.mouse_y = None
@@ -30,11 +33,20 @@ class HexApp:
         self._key = None
         self._replay = False
 
+        # Non-interactive players choose their tiles on a background thread, so the window stays
+        # responsive. After move_timeout seconds (None: never) or on Space the player is asked to stop.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self._thinking_player = None
+        self._thinking_since = 0.0
+        self.move_timeout = move_timeout
+        self._status_font = None
+
         use_puzzle_game = isinstance(player2, PuzzlePlayer)
         if use_puzzle_game:
-            self.hex = PuzzleHexGame(board, player1, player2)
+            self.hex = PuzzleHexGame(board, player1, player2, board_cls)
         else:
-            self.hex = HexGame(board, player1, player2)
+            self.hex = HexGame(board, player1, player2, board_cls)
 
         # Ensures that no swap is applied if more than 1 tile is occupied
         self.hex.set_turn(1 + (board != 0).sum())
@@ -47,6 +59,7 @@ class HexApp:
             self._display_surf = pygame.display.set_mode(
                 self.disp_size, pygame.HWSURFACE | pygame.DOUBLEBUF)
             pygame.display.set_caption("Hex Game ({:d} x {:d})".format(self.x_dim, self.y_dim))
+            self._status_font = pygame.font.SysFont(None, 28)
         except:
             # pygame.quit()
             return False
@@ -75,13 +88,15 @@ class HexApp:
             else:
                 (i, j) = (-1, -1)
 
-            if self.hex.wait_for_swap():
+            if self._pending is None and self.hex.wait_for_swap():
                 self.hex.swap()
                 self.render()
 
-            self.hex.turn(i, j)
+            self.__play_turn(i, j)
 
-            fin = self.hex.check_finish()
+            # Not checked while a move is searched, check_finish of a puzzle game uses the same
+            # web driver as the search thread (and the result can only change after a move)
+            fin = self.hex.check_finish() if self._pending is None else 0
             if fin > 0:
                 self.fin = fin
                 self.render()
@@ -134,26 +149,69 @@ class HexApp:
             pygame.draw.lines(self._display_surf, PLAYER_COLORS[1], False, self._points_left_border, 5)
             pygame.draw.lines(self._display_surf, PLAYER_COLORS[1], False, self._points_right_border, 5)
 
+            if self._pending is not None:
+                msg = self._status_font.render("Player {:d} is thinking... {:.1f}s (Space: move now)".format(
+                    self.hex.get_player(), time.time() - self._thinking_since), True, BORDER_COLOR)
+                self._display_surf.blit(msg, (10, 10))
+
         pygame.display.flip()
 
     def cleanup(self):
-        pass # main program quits pygame!
+        # Background searches of the players must not outlive the game
+        if self._pending is not None:
+            while not wait([self._pending], timeout=0.05).done:
+                self._thinking_player.stop_search()
+            self._pending = None
+        self._executor.shutdown()
+        for player in self.hex.players:
+            player.stop_pondering()
+        # main program quits pygame!
         # pygame.quit()
 
     def execute(self):
         if not self.pygame_init():
             self._running = False
 
+        clock = pygame.time.Clock()
         while self._running:
-            event = pygame.event.poll()
-            self.on_event(event)
+            for event in pygame.event.get():
+                self.on_event(event)
             self.on_loop()
             self.render()
+            clock.tick(FRAMES_PER_SECOND)
 
         self.cleanup()
 
         return self._replay, self.fin
 
+    def __play_turn(self, i, j):
+        # Interactive players move at once with the clicked tile (i, j). Other players get a copy of
+        # the board on the background thread, their move is played in a later frame once it is done.
+        player = self.hex.players[self.hex.get_player() - 1]
+        if player.interactive:
+            self.hex.turn(i, j)
+            return
+
+        if self._pending is None:
+            self._pending = self._executor.submit(player.choose_tile, self.hex.board.copy())
+            self._thinking_player = player
+            self._thinking_since = time.time()
+            return
+
+        if self._key_press and self._key == pygame.K_SPACE or \
+                self.move_timeout is not None and time.time() - self._thinking_since > self.move_timeout:
+            # Asked again every frame, in case the search had not started yet
+            player.stop_search()
+
+        while self._pending.done():
+            move = self._pending.result()
+            if not isinstance(move, Future):
+                self._pending = None
+                self.hex.play(*move)
+                return
+            # choose_tile returned a future itself, e.g. of a search process
+            self._pending = move
+
     def __get_tile_index(self, x_pos, y_pos):
         # Check if mouse position (x_pos, y_pos) corresponds to a tile (i, j)
         # Returns (-1, -1) if not successful.
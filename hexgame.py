@@ -1,4 +1,8 @@
-import numpy as np
+from concurrent.futures import Future
+
+from board_geometry import get_geometry, iter_bits
+from union_find import UnionFind
+
 
 class HexBoard:
     def __init__(self, board):
@@ -15,6 +19,68 @@ class HexBoard:
     
     """
         self.board = board.astype(int)
+        self._reset_state()
+
+    def _reset_state(self):
+        # Builds incremental state of current tiles and clears the move history.
+        x_dim, y_dim = self.dim()
+        self._geometry = get_geometry(y_dim, x_dim)
+        self._build_state()
+        self._history = []
+
+        # Zobrist hash of the position and of the position after a swap
+        g = self._geometry
+        self._hash = 0
+        self._swap_hash = 0
+        for idx in range(g.size):
+            player = self.get_tile(*divmod(idx, g.cols))
+            if player > 0:
+                self._hash ^= g.zobrist[player][idx]
+                self._swap_hash ^= g.zobrist_swapped[player][idx]
+
+    def _build_state(self) -> None:
+        # One disjoint-set forest per player over all tiles and two virtual nodes
+        # for his edges (top/bottom for player 1, left/right for player 2),
+        # and a bitmask of all empty tiles (bit i * cols + j for tile (i, j)).
+        n = self._geometry.size
+        self._union_find = [None, UnionFind(n + 2), UnionFind(n + 2)]
+        self._empty = 0
+        rows, cols = self._geometry.rows, self._geometry.cols
+        for i in range(rows):
+            for j in range(cols):
+                player = self.get_tile(i, j)
+                if player > 0:
+                    self._connect(i * cols + j, player)
+                else:
+                    self._empty |= 1 << (i * cols + j)
+
+    def _connect(self, idx, player) -> None:
+        # Merges tile idx of player with his neighboring tiles and edges.
+        g = self._geometry
+        union_find = self._union_find[player]
+        for k in self._friendly_neighbors(idx, player):
+            union_find.union(idx, k)
+        bit = 1 << idx
+        start, end = g.edges(player)
+        if start & bit:
+            union_find.union(idx, g.size)
+        if end & bit:
+            union_find.union(idx, g.size + 1)
+
+    def _friendly_neighbors(self, idx, player) -> list:
+        # Returns flat indices of neighbors of tile idx occupied by player.
+        flat = self.board.flat
+        return [k for k in self._geometry.neighbor_ids[idx] if flat[k] == player]
+
+    def _clear_tile(self, idx) -> None:
+        self.board.flat[idx] = 0
+
+    def _swap_tiles(self) -> None:
+        ones = (self.board == 1)
+        twos = (self.board == 2)
+        self.board[ones], self.board[twos] = 2, 1
+        self.board = self.board.transpose()
+        self._geometry = get_geometry(*self.board.shape)
 
     def dim(self) -> tuple:
         # Returns dimension of board (x-direction, y-direction)
@@ -22,10 +88,12 @@ class HexBoard:
 
     def swap(self) -> None:
         # Performs a swap in Hex game by swapping colors and mirroring the board.
-        ones = (self.board == 1)
-        twos = (self.board == 2)
-        self.board[ones], self.board[twos] = 2, 1
-        self.board = self.board.transpose()
+        # Incremental state is rebuilt, the previous state is kept for undo.
+        previous = self._union_find, self._empty
+        self._swap_tiles()
+        self._build_state()
+        self._hash, self._swap_hash = self._swap_hash, self._hash
+        self._history.append((None, None, previous))
 
     def get_tile(self, i, j) -> int:
         # Returns value of tile (i,j)
@@ -42,9 +110,82 @@ class HexBoard:
         # Check if tile can be set
         if self.board[i, j] == 0:
             self.board[i, j] = val
+            self._record(i * self._geometry.cols + j, val)
             return True
         return False
 
+    def _record(self, idx, val) -> None:
+        # Updates incremental state after tile idx was set and remembers how to undo it.
+        mark = self._union_find[val].mark()
+        self._connect(idx, val)
+        self._empty &= ~(1 << idx)
+        self._hash ^= self._geometry.zobrist[val][idx]
+        self._swap_hash ^= self._geometry.zobrist_swapped[val][idx]
+        self._history.append((idx, val, mark))
+
+    def play(self, cell, player) -> bool:
+        # Puts a tile of player on cell (i, j), can be taken back with undo.
+        # Returns False (and changes nothing) if the tile is not available.
+        return self.set_tile(cell[0], cell[1], player)
+
+    def undo(self):
+        # Takes back the last set_tile/play (or swap) without rebuilding anything.
+        # Returns the freed tile (i, j), None for an undone swap.
+        idx, val, state = self._history.pop()
+        if idx is None:
+            self._swap_tiles()
+            self._union_find, self._empty = state
+            self._hash, self._swap_hash = self._swap_hash, self._hash
+            return None
+        self._union_find[val].rollback(state)
+        self._empty |= 1 << idx
+        self._hash ^= self._geometry.zobrist[val][idx]
+        self._swap_hash ^= self._geometry.zobrist_swapped[val][idx]
+        self._clear_tile(idx)
+        return divmod(idx, self._geometry.cols)
+
+    def zobrist_hash(self) -> int:
+        # Returns 64-bit Zobrist hash of the position (keys are shared by all boards of the same size).
+        return self._hash
+
+    def num_moves(self) -> int:
+        # Returns number of moves on the move stack (i.e. how often undo can be called).
+        return len(self._history)
+
+    def empty_mask(self) -> int:
+        # Returns bitmask of all empty tiles.
+        return self._empty
+
+    def legal_moves(self) -> list:
+        # Returns all empty tiles (i, j) in row-major order.
+        cols = self._geometry.cols
+        return [divmod(idx, cols) for idx in iter_bits(self._empty)]
+
+    def is_connected(self, player) -> bool:
+        # Checks whether player connects both of his edges.
+        n = self._geometry.size
+        return self._union_find[player].connected(n, n + 1)
+
+    def winner(self) -> int:
+        # Returns id of player who has won, 0 if game goes on.
+        if self.is_connected(1):
+            return 1
+        if self.is_connected(2):
+            return 2
+        return 0
+
+    def copy(self):
+        # Returns independent copy of the board (move history is not copied).
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other._copy_tiles()
+        other._union_find = [None, self._union_find[1].copy(), self._union_find[2].copy()]
+        other._history = []
+        return other
+
+    def _copy_tiles(self) -> None:
+        self.board = self.board.copy()
+
     def get_row(self, i):
         # Returns ith row of the board if i is valid index, otherwise None.
         if 0 <= i < self.board.shape[1]:
@@ -90,7 +231,7 @@ class HexBoard:
 
 
 class HexGame:
-    def __init__(self, board, player1, player2):
+    def __init__(self, board, player1, player2, board_cls=HexBoard):
         """
     Initializes hex game.
 
@@ -102,9 +243,11 @@ class HexGame:
         Instance of class Player representing player 1 (red player).
     player2 : Player
         Instance of class Player representing player 2 (blue player).
+    board_cls : type, optional
+        Board backend, HexBoard or a drop-in replacement like bitboard.BitHexBoard.
     """
         # Initialize board
-        self.board = HexBoard(board)
+        self.board = board_cls(board)
         self.players = [player1, player2]
 
         player1.set_id(1)
@@ -122,35 +265,20 @@ class HexGame:
         self._current_player = (self._current_player % self._num_players) + 1
 
     def check_finish(self) -> int:
-        # We build a "visited" matrix for both players, similar to bfs/dfs
-        visited = np.zeros(self.board.dim(), dtype=int)
-
-        # Check player 1 (red, top)
-        pl_id = 1
-        for j in range(visited.shape[1]):
-            if self.board.get_tile(0, j) == pl_id:
-                visited[0, j] = pl_id
-                visited = self.__visit(0, j, pl_id, visited)
-
-        if np.any(visited[-1, :] == pl_id):
-            return pl_id
-
-        # Check player 2 (blue, left)
-        pl_id = 2
-        for i in range(visited.shape[0]):
-            if self.board.get_tile(i, 0) == pl_id:
-                visited[i, 0] = pl_id
-                self.__visit(i, 0, pl_id, visited)
-
-        if np.any(visited[:, -1] == pl_id):
-            return pl_id
-
-        return 0  # game goes on
+        # The board keeps track of connected tiles, so no search is needed.
+        # Player 1 (red) connects top to bottom, player 2 (blue) left to right.
+        return self.board.winner()
 
     def turn(self, *args):
         # Player gets new tile if it does not already belong to opposite player
 
-        (i, j) = self.players[self._current_player - 1].choose_tile(self.board, *args)
+        move = self.players[self._current_player - 1].choose_tile(self.board, *args)
+        if isinstance(move, Future):
+            move = move.result()
+        return self.play(*move)
+
+    def play(self, i, j) -> bool:
+        # Current player gets tile (i, j) if it is still empty, returns whether the move was valid.
         valid = self.board.set_tile(i, j, self._current_player)
         if valid:
             self._turns += 1
@@ -167,26 +295,16 @@ class HexGame:
     def set_turn(self, turn):
         self._turns = turn
 
-    def swap(self, *args):
-        # TODO: Check if also IDs have to be swapped.
+    def swap(self, *args) -> bool:
+        # The player to move may take over the opponent's first tile (mirrored into the own color),
+        # then the opponent moves again. Players keep their colors. Returns whether the swap was claimed.
+        res = False
         if self.wait_for_swap():
             res = self.players[self._current_player - 1].claim_swap(self.board, *args)
             if res:
                 self.board.swap()
                 self.switch_player()
-                self.players[0].id, self.players[1].id = self.players[1].id, self.players[0].id
-
-    # "Private" methods
-    def __visit(self, i, j, player, visited) -> np.ndarray:
-        x_dim, y_dim = self.board.dim()
-        candidates = [(i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j + 1), (i + 1, j), (i + 1, j - 1)]
-        neighbors = [(i, j) for (i, j) in candidates if 0 <= i < y_dim and 0 <= j < x_dim]
-
-        for (k, l) in neighbors:
-            if self.board.get_tile(k, l) == player and not visited[k, l]:
-                visited[k, l] = player
-                visited = self.__visit(k, l, player, visited)
-        return visited
+        return res
 
 
 class PuzzleHexGame(HexGame):
@@ -4,6 +4,7 @@ from human_player import HumanPlayer
 # from ai_player_improved import MinMaxPlayer
 from ai_player_improved_zobrist_2 import MinMaxPlayer
 # from WORKING_FINAL import MinMaxPlayer
+# from mcts_player import MCTSPlayer
 from ai_player import AIPlayer
 from hexapp import HexApp
 from tabulate import tabulate
@@ -51,6 +52,8 @@ if __name__ == "__main__":
 
     dim = 11
     # player1 = MinMaxPlayer(dimension=dim)
+    # player1 = MinMaxPlayer(dimension=dim, ponder=True)  # keeps searching during the opponent's turn
+    # player1 = MCTSPlayer(dimension=dim)
     player1 = AIPlayer()
     player2 = RandomPlayer()
 
@@ -83,5 +86,8 @@ if __name__ == "__main__":
             play = False
         
     print_win_table(totalIteration, player1wins, player2wins, dim)
-        
+
+    # Stops worker processes and frees shared transposition tables
+    player1.close()
+    player2.close()
     pygame.quit()
\ No newline at end of file
@@ -2,6 +2,8 @@ from base_player import BasePlayer
 
 
 class HumanPlayer(BasePlayer):
+    interactive = True
+
     def choose_tile(self, board, *args) -> tuple:
         """
         Chooses a tile based on given heuristic / algorithm.
@@ -0,0 +1,443 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from base_player import BasePlayer
+from batch_playout import batch_playouts
+from bitboard import BitHexBoard
+from board_geometry import iter_bits
+from parallel_search import WorkerPool
+from search_stats import SearchStats, SELECTION, PLAYOUT, BACKPROPAGATION
+
+EXPLORATION = 1.0  # UCT exploration constant
+RAVE_EQUIVALENCE = 300  # playouts after which UCT and AMAF values are weighted equally
+SECTIONS = (SELECTION, PLAYOUT, BACKPROPAGATION)  # Parts of the search time in SearchStats
+
+
+class Node:
+    __slots__ = ("move", "player", "parent", "children", "untried", "visits", "wins",
+                 "child_visits", "child_wins", "amaf_visits", "amaf_wins")
+
+    def __init__(self, move, player, parent, untried=None):
+        # Node of the search tree: position after player played move (flat tile index).
+        # Moves to try are listed when the node is expanded for the first time.
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0  # playouts won by player
+
+        # Statistics of the children and AMAF statistics of the player to move here,
+        # one flat array entry per tile, created when the node is expanded
+        self.child_visits = None
+        self.child_wins = None
+        self.amaf_visits = None
+        self.amaf_wins = None
+
+    def expand(self, untried, size, rave) -> None:
+        self.untried = untried
+        self.child_visits = np.zeros(size)
+        self.child_wins = np.zeros(size)
+        if rave:
+            self.amaf_visits = np.zeros(size)
+            self.amaf_wins = np.zeros(size)
+
+    def select_child(self, exploration, equivalence=None):
+        """
+        Returns the child with the highest UCT value.
+
+        With RAVE the win rate q of a child is blended with its AMAF win
+        rate by beta = sqrt(k / (3 n + k)), so AMAF dominates while the child
+        has few playouts n and UCT once it has many.
+
+        Parameters
+        ----------
+        exploration : float
+            UCT exploration constant.
+        equivalence : float, optional
+            RAVE equivalence parameter k (None: plain UCT).
+
+        Returns
+        -------
+        child : Node
+            Selected child.
+
+        """
+        visits = self.child_visits
+        tried = visits > 0
+        n = np.maximum(visits, 1)
+        value = self.child_wins / n
+        if equivalence is not None:
+            beta = np.sqrt(equivalence / (3 * n + equivalence))
+            amaf = (self.amaf_wins + 0.5) / (self.amaf_visits + 1)
+            value = (1 - beta) * value + beta * amaf
+        value += exploration * np.sqrt(math.log(self.visits) / n)
+        return self.children[int(np.argmax(np.where(tried, value, -np.inf)))]
+
+    def pop_untried(self, rave):
+        # Removes and returns next move to expand: best AMAF win rate with RAVE, else random.
+        if rave:
+            untried = np.array(self.untried)
+            rate = (self.amaf_wins[untried] + 0.5) / (self.amaf_visits[untried] + 1)
+            k = int(np.argmax(rate))
+        else:
+            k = random.randrange(len(self.untried))
+        move = self.untried[k]
+        self.untried[k] = self.untried[-1]
+        self.untried.pop()
+        return move
+
+
+class MCTSPlayer(BasePlayer):
+    def __init__(self, dimension, time_limit=10, playouts=None, exploration=EXPLORATION, batch_size=None,
+                 rave_equivalence=RAVE_EQUIVALENCE, workers=1, verbose=True, stats_log=None):
+        """
+        Monte Carlo tree search (UCT) player.
+
+        Hex has no draws and a filled board has exactly one winner, so a
+        random playout fills all empty tiles at once (alternately for both
+        players) and only checks once whether player 1 connects the edges.
+        The subtree of the chosen move is kept for the next move.
+
+        With batch_size, each new leaf is evaluated by that many playouts
+        at once (batch_playout), which pays off on large boards.
+
+        Unless rave_equivalence is None, every tile a player got in a playout counts
+        as if it had been that player's first move (all-moves-as-first).
+        These AMAF statistics are kept per node in flat arrays over all
+        tiles and blended into the UCT value (RAVE), which gives useful
+        values for moves long before they have been tried often.
+
+        Parameters
+        ----------
+        dimension : int
+            Size of the board.
+        time_limit : float
+            Seconds per move.
+        playouts : int, optional
+            Maximum number of playouts per move (None: only the time limit).
+        exploration : float
+            UCT exploration constant.
+        batch_size : int, optional
+            Number of playouts per leaf, run as one NumPy batch (None: one playout per leaf).
+        rave_equivalence : float, optional
+            Playouts of a move after which its own and its AMAF win rate
+            are weighted equally (None: plain UCT).
+        workers : int
+            Number of worker processes. With more than one, each worker
+            searches its own tree for the whole time (root parallelization)
+            and the visits of the root moves are added up at the deadline.
+        verbose : bool
+            Whether to print playouts and playouts/sec after each move.
+        stats_log : str, optional
+            Path of a JSONL file that gets the SearchStats of every move.
+
+        """
+        super().__init__()
+        self.dimension = dimension
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.exploration = exploration
+        self.batch_size = batch_size
+        self.rave_equivalence = rave_equivalence
+        self.verbose = verbose
+        self._rng = np.random.default_rng()
+
+        # Parallel search: worker processes are started at the first move and reused
+        self.workers = workers
+        self._config = dict(dimension=dimension, exploration=exploration, batch_size=batch_size,
+                            rave_equivalence=rave_equivalence)
+        self._pool = None
+
+        self.root = None
+        self._root_key = None
+        self._deadline = float('inf')
+        self.last_playouts = 0
+        self.playouts_per_second = 0.0
+
+        # Statistics of the running search and of the last move (nodes are new tree nodes,
+        # leaf evaluations are playouts and max_ply is the deepest selection)
+        self.stats = SearchStats(SECTIONS)
+        self.last_stats = None
+        self.stats_log = stats_log
+
+    def choose_tile(self, board, *args) -> tuple:
+        """
+        Chooses a tile based on the AI's strategy.
+
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board.
+        args : tuple, optional
+            Further parameters possibly required by the AI strategy.
+
+        Returns
+        -------
+        res : tuple (int, int)
+            Indices of the resulting tile.
+
+        """
+        return self.find_best_move(board, self.time_limit, self.playouts)
+
+    def find_best_move(self, board, time_limit_seconds, max_playouts=None) -> tuple:
+        # Runs playouts until time or playout budget is used up and returns the most visited move.
+        start_time = time.time()
+        self.stats = SearchStats(SECTIONS)
+        if self.workers > 1:
+            visits, playouts = self._parallel_search(board, time_limit_seconds, max_playouts)
+            reused = 0
+        else:
+            root, playouts = self.search(board, time_limit_seconds, max_playouts)
+            visits = {move: child.visits for move, child in root.children.items()}
+            reused = root.visits - playouts
+
+        elapsed = time.time() - start_time
+        self.last_playouts = playouts
+        self.playouts_per_second = playouts / elapsed if elapsed > 0 else float('inf')
+        if self.verbose:
+            print("MCTS: {:d} playouts in {:.2f}s ({:.0f} playouts/s), {:d} playouts reused".format(
+                playouts, elapsed, self.playouts_per_second, reused))
+
+        best = divmod(max(visits, key=visits.get), board.dim()[0])
+        self.stats.move = best
+        self.stats.seconds = elapsed
+        self.last_stats = self.stats
+        if self.stats_log is not None:
+            self.stats.write(self.stats_log, player=self.id)
+        return best
+
+    def search(self, board, time_limit_seconds, max_playouts=None) -> tuple:
+        """
+        Runs playouts from the position until time or playout budget is used up.
+
+        Parameters
+        ----------
+        board : HexBoard
+            Current state of the Hex board, this player is to move.
+        time_limit_seconds : float
+            Time for the search.
+        max_playouts : int, optional
+            Maximum number of playouts.
+
+        Returns
+        -------
+        root : Node
+            Root of the search tree (kept for the next search).
+        playouts : int
+            Number of playouts done.
+
+        """
+        self._deadline = time.time() + time_limit_seconds
+        position = BitHexBoard(board.board)
+        g = position._geometry
+        stones = [0, position.stones(1), position.stones(2)]
+        root = self._reuse_root(stones)
+        if root is None:
+            root = Node(None, 3 - self.id, None)
+
+        playouts = 0
+        while (max_playouts is None or playouts < max_playouts) and (playouts == 0 or time.time() < self._deadline):
+            playouts += self._playout(root, list(stones), g)
+
+        self.root = root
+        self._root_key = tuple(stones)
+        return root, playouts
+
+    def _parallel_search(self, board, time_limit_seconds, max_playouts) -> tuple:
+        # Root parallelization: every worker searches its own tree, visits of the root moves are added up.
+        if self._pool is None:
+            self._pool = WorkerPool(self.workers, _init_search_worker, self._config)
+        if max_playouts is not None:
+            max_playouts = -(-max_playouts // self.workers)
+        results = self._pool.run(_search_position, [(board.board, self.id, time_limit_seconds, max_playouts)]
+                                 * self.workers)
+        visits = {}
+        for worker_visits, _, stats in results:
+            for move, count in worker_visits.items():
+                visits[move] = visits.get(move, 0) + count
+            self.stats.merge(stats)
+        return visits, sum(playouts for _, playouts, _ in results)
+
+    def stop_search(self) -> None:
+        # Ends a search running on another thread after the current playout (not in worker processes).
+        self._deadline = float('-inf')
+
+    def close(self) -> None:
+        # Stops the worker processes of a parallel search.
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _reuse_root(self, stones):
+        # Returns node of the current position if it is the previous root position
+        # plus one tile of this player and then one tile of the opponent.
+        if self.root is None:
+            return None
+        previous = self._root_key
+        node = self.root
+        for player in (self.id, 3 - self.id):
+            added = stones[player] & ~previous[player]
+            if stones[player] & previous[player] != previous[player] or not added or added & (added - 1):
+                # Other game, colors swapped or not exactly one new tile
+                return None
+            node = node.children.get(added.bit_length() - 1)
+            if node is None:
+                return None
+        node.parent = None
+        return node
+
+    def _playout(self, root, stones, g) -> int:
+        # One iteration: selection, expansion, random fill of the remaining tiles, backpropagation.
+        # Returns number of playouts done.
+        rave = self.rave_equivalence is not None
+        stats = self.stats
+        start = time.perf_counter()
+        node = root
+        ply = 0
+        while not node.untried and node.children:
+            node = node.select_child(self.exploration, self.rave_equivalence)
+            stones[node.player] |= 1 << node.move
+            ply += 1
+        if ply > stats.max_ply:
+            stats.max_ply = ply
+
+        # Expansion counts as selection, the playout starts with the fill
+        if node.untried is None:
+            node.expand(self._empty(stones, g), g.size, rave)
+
+        owned = None
+        if node.untried:
+            move = node.pop_untried(rave)
+            player = 3 - node.player
+            stones[player] |= 1 << move
+            won = g.connects(stones[player], player)
+            # A won position is a leaf, nothing left to try
+            child = Node(move, player, node, [] if won else None)
+            node.children[move] = child
+            node = child
+            stats.nodes += 1
+            now = time.perf_counter()
+            stats.times[SELECTION] += now - start
+            start = now
+            if won:
+                wins = self._decided(node.player)
+            elif self.batch_size:
+                wins, owned = self._batch_fill(node, stones, g)
+            else:
+                ones = self._random_fill(node, stones, g)
+                wins = self._decided(1 if g.connects(ones, 1) else 2)
+                if rave:
+                    owned = self._owned(ones, wins, stones, g)
+        else:
+            # Terminal position, the player who moved last has connected the edges
+            now = time.perf_counter()
+            stats.times[SELECTION] += now - start
+            start = now
+            wins = self._decided(node.player)
+        now = time.perf_counter()
+        stats.times[PLAYOUT] += now - start
+        start = now
+
+        playouts = wins[1] + wins[2]
+        stats.leaf_evaluations += playouts
+        tree_moves = []
+        while node is not None:
+            node.visits += playouts
+            node.wins += wins[node.player]
+            if node.amaf_visits is not None:
+                self._update_amaf(node, playouts, wins, owned, tree_moves)
+            parent = node.parent
+            if parent is not None:
+                parent.child_visits[node.move] += playouts
+                parent.child_wins[node.move] += wins[node.player]
+            tree_moves.append(node)
+            node = parent
+        stats.times[BACKPROPAGATION] += time.perf_counter() - start
+        return playouts
+
+    def _update_amaf(self, node, playouts, wins, owned, tree_moves):
+        # Credits all tiles the player to move got below node (in the tree and in the playouts).
+        player = 3 - node.player
+        if owned is not None:
+            visits, won = owned[player]
+            node.amaf_visits += visits
+            if won is not None:
+                node.amaf_wins += won
+        for below in tree_moves:
+            if below.player == player:
+                node.amaf_visits[below.move] += playouts
+                node.amaf_wins[below.move] += wins[player]
+
+    def _owned(self, ones, wins, stones, g) -> list:
+        # AMAF counts of one filled board: per player (tiles filled by player, the same tiles if player won).
+        empty = g.full & ~(stones[1] | stones[2])
+        owned = [None]
+        for player, mask in ((1, ones & empty), (2, empty & ~ones)):
+            tiles = g.unpack(mask).ravel()
+            owned.append((tiles, tiles if wins[player] else None))
+        return owned
+
+    def _decided(self, winner) -> list:
+        # Wins per player of a leaf with known winner, weighted like a batch of playouts.
+        wins = [0, 0, 0]
+        wins[winner] = self.batch_size or 1
+        return wins
+
+    def _batch_fill(self, node, stones, g) -> tuple:
+        # Runs batch_size random fills of the position at once.
+        # Returns wins per player and AMAF counts per player (see _owned).
+        board = np.zeros((g.rows, g.cols), dtype=np.int8)
+        board[g.unpack(stones[1])] = 1
+        board[g.unpack(stones[2])] = 2
+        to_move = 3 - node.player
+        statistics = batch_playouts(board, self.batch_size, to_move, self._rng)
+        n, won = statistics.playouts, statistics.wins
+        wins = [0, 0, 0]
+        wins[to_move] = won
+        wins[node.player] = n - won
+
+        empty = (board == 0).ravel()
+        owned = [None, None, None]
+        cell_owned = np.where(empty, statistics.cell_owned.ravel(), 0)
+        cell_wins = np.where(empty, statistics.cell_wins.ravel(), 0)
+        owned[to_move] = (cell_owned, cell_wins)
+        # The opponent owns a tile when player does not, and wins when player loses
+        owned[node.player] = (np.where(empty, n - cell_owned, 0), np.where(empty, n - cell_owned - won + cell_wins, 0))
+        return wins, owned
+
+    def _empty(self, stones, g) -> list:
+        # Returns flat indices of all empty tiles.
+        return list(iter_bits(g.full & ~(stones[1] | stones[2])))
+
+    def _random_fill(self, node, stones, g) -> int:
+        # Fills all empty tiles alternately for both players (player to move first).
+        # Returns tiles of player 1 on the filled board.
+        empty = self._empty(stones, g)
+        random.shuffle(empty)
+        half = (len(empty) + 1) // 2
+        to_move = 3 - node.player
+        filled = stones[to_move]
+        for idx in empty[:half]:
+            filled |= 1 << idx
+        # Player 1 owns all tiles player 2 does not own
+        return filled if to_move == 1 else g.full & ~filled
+
+
+def _init_search_worker(index, config) -> MCTSPlayer:
+    # Engine of a worker process, with its own random state (forked workers would play the same playouts).
+    random.seed()
+    return MCTSPlayer(verbose=False, **config)
+
+
+def _search_position(player, position, player_id, time_limit_seconds, max_playouts) -> tuple:
+    # Searches position in a worker, returns visits per root move (flat tile index), number of playouts
+    # and SearchStats.
+    player.set_id(player_id)
+    player.stats = SearchStats(SECTIONS)
+    root, playouts = player.search(BitHexBoard(position), time_limit_seconds, max_playouts)
+    return {move: child.visits for move, child in root.children.items()}, playouts, player.stats
@@ -0,0 +1,102 @@
+import multiprocessing
+import traceback
+
+
+class WorkerPool:
+    def __init__(self, workers, initializer, *initargs):
+        """
+        Fixed set of worker processes, each with its own search engine.
+
+        Workers are started once and reused for every move, so engines keep
+        their state (transposition tables, search trees) between moves.
+        Unlike multiprocessing.Pool, call k of run always goes to worker k.
+
+        Parameters
+        ----------
+        workers : int
+            Number of worker processes.
+        initializer : callable
+            initializer(worker_index, *initargs) is called once in each
+            worker and returns its engine (must be picklable by reference,
+            i.e. a module-level function).
+        initargs : tuple
+            Further arguments of initializer, e.g. shared multiprocessing
+            values (passed on when the workers are started).
+
+        """
+        self._connections = []
+        self._processes = []
+        for index in range(workers):
+            parent_end, worker_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_loop, args=(worker_end, initializer, index, initargs),
+                                              daemon=True)
+            process.start()
+            worker_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+
+    @property
+    def workers(self) -> int:
+        return len(self._processes)
+
+    def run(self, function, calls) -> list:
+        """
+        Runs function(engine, *args) in the workers and waits for all results.
+
+        Parameters
+        ----------
+        function : callable
+            Module-level function, called with the engine of the worker first.
+        calls : list of tuples
+            Arguments per worker (at most one call per worker).
+
+        Returns
+        -------
+        results : list
+            Result of each call, in the order of calls.
+
+        """
+        for connection, args in zip(self._connections, calls):
+            connection.send((function, args))
+        results = [connection.recv() for connection in self._connections[:len(calls)]]
+        for result in results:
+            if isinstance(result, _WorkerError):
+                raise RuntimeError("Search worker failed:\n" + result.traceback)
+        return results
+
+    def close(self) -> None:
+        # Stops all workers.
+        for connection in self._connections:
+            try:
+                connection.send(None)
+                connection.close()
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=1)
+        self._connections = []
+        self._processes = []
+
+
+class _WorkerError:
+    def __init__(self, text):
+        # Formatted traceback of an exception raised in a worker.
+        self.traceback = text
+
+
+def _worker_loop(connection, initializer, index, initargs):
+    # Main function of a worker process: creates the engine and serves calls until None is received.
+    engine = initializer(index, *initargs)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        function, args = message
+        try:
+            result = function(engine, *args)
+        except Exception:
+            result = _WorkerError(traceback.format_exc())
+        connection.send(result)
@@ -1,7 +1,12 @@
-from base_player import BasePlayer
+from base_player import BasePlayer, THINK_TIME
 
 
 class RandomPlayer(BasePlayer):
+    def __init__(self, swap_fun=lambda board, *args: False, think_time=THINK_TIME):
+        # think_time: seconds each move is delayed (0 for games without GUI)
+        super().__init__(swap_fun)
+        self.think_time = think_time
+
     def choose_tile(self, board, *args) -> tuple:
         """
         Chooses a tile based on given heuristic / algorithm.
@@ -19,4 +24,4 @@ class RandomPlayer(BasePlayer):
             Indices of resulting tile.
 
         """
-        return BasePlayer.random_choice(board, *args)
+        return BasePlayer.random_choice(board, *args, think_time=self.think_time)
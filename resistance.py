@@ -0,0 +1,204 @@
+import numpy as np
+
+from batch_evaluation import stack_children
+from board_geometry import get_geometry
+
+OWN_RESISTANCE = 0.01  # resistance of a tile of the player (empty tiles have resistance 1)
+LEAK = 1e-6  # conductance of every node to ground, keeps the system solvable if a player is cut off
+MAX_SCORE = 100.0  # scores are clamped to [-MAX_SCORE, MAX_SCORE]
+
+
+class CircuitPattern:
+    def __init__(self, rows, cols, player):
+        """
+        Sparsity pattern of the circuit of one player on a (rows x cols) board.
+
+        Nodes are the tiles (flat index i * cols + j) plus a source node for
+        the player's start edge and a ground node for the end edge. Every
+        pair of neighboring tiles and every edge tile with its edge node is
+        a wire. The ground node is left out of the (reduced) Laplacian.
+
+        The pattern holds the indices of the nonzero entries of the
+        Laplacian. ResistanceEvaluator scatters the conductances into dense
+        matrices, so a whole stack of boards is solved by one np.linalg.solve
+        call (NumPy has no sparse solver).
+
+        Parameters
+        ----------
+        rows : int
+            Number of rows of the board.
+        cols : int
+            Number of columns of the board.
+        player : int
+            Player 1 connects top to bottom, player 2 left to right.
+
+        """
+        g = get_geometry(rows, cols)
+        self.size = g.size
+        self.source = g.size
+        self.ground = g.size + 1
+
+        first = []
+        second = []
+        for idx, neighbors in enumerate(g.neighbor_ids):
+            for k in neighbors:
+                if idx < k:
+                    first.append(idx)
+                    second.append(k)
+        start, end = g.edges(player)
+        for idx in range(g.size):
+            if start >> idx & 1:
+                first.append(idx)
+                second.append(self.source)
+            if end >> idx & 1:
+                first.append(idx)
+                second.append(self.ground)
+        self.first = np.array(first)
+        self.second = np.array(second)
+
+        # Wires between two nodes of the reduced system, and their index among all wires
+        inner = self.second != self.ground
+        self.inner = np.flatnonzero(inner)
+        self.inner_first = self.first[inner]
+        self.inner_second = self.second[inner]
+        # Incidence of wires and nodes, degree of each node is conductances @ incidence
+        self.incidence = np.zeros((len(first), g.size + 1))
+        self.incidence[np.arange(len(first)), self.first] = 1
+        self.incidence[self.inner, self.inner_second] = 1
+
+
+_PATTERNS = {}
+
+
+def get_pattern(rows, cols, player) -> CircuitPattern:
+    # Patterns only depend on the board size and player, so they are computed once.
+    pattern = _PATTERNS.get((rows, cols, player))
+    if pattern is None:
+        pattern = _PATTERNS[(rows, cols, player)] = CircuitPattern(rows, cols, player)
+    return pattern
+
+
+class ResistanceEvaluator:
+    def __init__(self, own_resistance=OWN_RESISTANCE, leak=LEAK):
+        """
+        Evaluates positions by the effective resistance between the edges.
+
+        Each player's board is a circuit between the two edges of that
+        player: own tiles are (almost) wires, empty tiles are resistors and
+        opponent tiles are open. A low resistance means many short,
+        independent ways to connect. The score of a position is
+        log(R_opponent / R_own), positive if it is good for the player.
+
+        Resistances of many boards are computed by one stacked call of
+        np.linalg.solve, so evaluating all children of a node costs about
+        one batched factorization.
+
+        Parameters
+        ----------
+        own_resistance : float
+            Resistance of a tile occupied by the player.
+        leak : float
+            Conductance of every node to ground.
+
+        """
+        self.own_resistance = own_resistance
+        self.leak = leak
+
+    def __call__(self, board, player_id) -> float:
+        # Allows using the evaluator as evaluation function of MinMaxPlayer.
+        return self.evaluate(board, player_id)
+
+    def evaluate(self, board, player_id) -> float:
+        """
+        Scores a single position.
+
+        Parameters
+        ----------
+        board : HexBoard or numpy array
+            Current state of the Hex board.
+        player_id : int
+            Player the score is computed for.
+
+        Returns
+        -------
+        score : float
+            log(R_opponent / R_own), clamped to [-MAX_SCORE, MAX_SCORE].
+
+        """
+        boards = np.asarray(getattr(board, "board", board))[np.newaxis]
+        return float(self.evaluate_boards(boards, player_id)[0])
+
+    def evaluate_moves(self, board, moves, player_id, mover) -> np.ndarray:
+        """
+        Scores the positions after each of the moves in one batch.
+
+        Parameters
+        ----------
+        board : HexBoard or numpy array
+            Current state of the Hex board.
+        moves : list of tuples (int, int)
+            Moves to evaluate, all on empty tiles.
+        player_id : int
+            Player the scores are computed for.
+        mover : int
+            Player making the moves.
+
+        Returns
+        -------
+        scores : numpy array
+            Score of the position after each move.
+
+        """
+        if not moves:
+            return np.zeros(0)
+        return self.evaluate_boards(stack_children(board, moves, mover), player_id)
+
+    def evaluate_boards(self, boards, player_id) -> np.ndarray:
+        # Scores a stack of boards (k, rows, cols) for player_id.
+        own = self.resistances(boards, player_id)
+        opponent = self.resistances(boards, 3 - player_id)
+        return np.clip(np.log(opponent / own), -MAX_SCORE, MAX_SCORE)
+
+    def resistances(self, boards, player) -> np.ndarray:
+        """
+        Effective resistances between the edges of a player.
+
+        Parameters
+        ----------
+        boards : numpy array
+            Stack of boards, shape (k, rows, cols).
+        player : int
+            Player whose circuit is solved.
+
+        Returns
+        -------
+        resistances : numpy array
+            Resistance of each board, shape (k,).
+
+        """
+        k, rows, cols = boards.shape
+        pattern = get_pattern(rows, cols, player)
+        tiles = boards.reshape(k, -1)
+
+        # Tile resistances, edge nodes have none
+        resistance = np.zeros((k, pattern.size + 2))
+        resistance[:, :pattern.size] = 1
+        resistance[:, :pattern.size][tiles == player] = self.own_resistance
+        resistance[:, :pattern.size][tiles == 3 - player] = np.inf
+        with np.errstate(divide="ignore"):
+            conductance = 1 / (resistance[:, pattern.first] + resistance[:, pattern.second])
+
+        # Reduced Laplacian (ground node removed) with a small leak on the diagonal
+        n = pattern.size + 1
+        laplacian = np.zeros((k, n, n))
+        inner = conductance[:, pattern.inner]
+        laplacian[:, pattern.inner_first, pattern.inner_second] = -inner
+        laplacian[:, pattern.inner_second, pattern.inner_first] = -inner
+        diagonal = conductance @ pattern.incidence + self.leak
+        laplacian[:, np.arange(n), np.arange(n)] = diagonal
+
+        # Unit current into the source, its potential is the resistance
+        current = np.zeros((k, n, 1))
+        current[:, pattern.source] = 1
+        potential = np.linalg.solve(laplacian, current)
+        return potential[:, pattern.source, 0]
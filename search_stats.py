@@ -0,0 +1,85 @@
+import json
+
+# Sections of the search time of MinMaxPlayer
+MOVE_GENERATION = "move_generation"
+TERMINAL_CHECK = "terminal_check"
+EVALUATION = "evaluation"
+HASHING = "hashing"
+
+# Sections of the search time of MCTSPlayer
+SELECTION = "selection"
+PLAYOUT = "playout"
+BACKPROPAGATION = "backpropagation"
+
+
+class SearchStats:
+    def __init__(self, sections=()):
+        """
+        Statistics of the search for one move.
+
+        Counters are updated by the search itself, so a player gets a new
+        object for every search (last_stats keeps the one of the last move).
+
+        Parameters
+        ----------
+        sections : tuple of str
+            Names of the parts the search time is broken down into.
+
+        """
+        self.move = None
+        self.seconds = 0.0
+        self.nodes = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0  # nodes where a move failed high
+        self.first_move_cutoffs = 0  # ... with the first move searched
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.depth = 0  # deepest completed iteration
+        self.max_ply = 0  # deepest node visited
+        self.times = dict.fromkeys(sections, 0.0)
+
+    def nps(self) -> float:
+        # Nodes per second.
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def first_move_cutoff_rate(self) -> float:
+        # Fraction of cutoffs caused by the first move, a measure of move ordering quality.
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def merge(self, other) -> None:
+        # Adds the statistics of another search of the same move (e.g. of a worker process).
+        # Times are added up as well, i.e. they are CPU seconds of all workers.
+        for name in ("nodes", "leaf_evaluations", "cutoffs", "first_move_cutoffs", "tt_probes", "tt_hits"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.depth = max(self.depth, other.depth)
+        self.max_ply = max(self.max_ply, other.max_ply)
+        for section, seconds in other.times.items():
+            self.times[section] = self.times.get(section, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        # Plain representation, e.g. for JSON.
+        return {
+            "move": list(self.move) if self.move is not None else None,
+            "seconds": self.seconds,
+            "nodes": self.nodes,
+            "nps": self.nps(),
+            "leaf_evaluations": self.leaf_evaluations,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate(),
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_hit_rate": self.tt_hit_rate(),
+            "depth": self.depth,
+            "max_ply": self.max_ply,
+            "times": dict(self.times),
+        }
+
+    def write(self, path, **fields) -> None:
+        # Appends the statistics as one JSON line to the file at path, with further fields (e.g. the player).
+        record = dict(fields)
+        record.update(self.to_dict())
+        with open(path, "a") as file:
+            file.write(json.dumps(record) + "\n")
@@ -0,0 +1,204 @@
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from elo import expected_score
+from tournament import play_scheduled_game
+
+H0 = "H0"  # engine A is not stronger than elo0
+H1 = "H1"  # engine A is at least elo1 stronger
+
+PAIR_SCORES = (0.0, 0.5, 1.0)  # score of engine A in a pair with 0, 1 and 2 wins
+PAIR_PRIOR = 1  # virtual pairs per outcome (like elo.PRIOR_GAMES), keeps the variance positive and early LLRs small
+
+
+class SPRT:
+    def __init__(self, elo0=0, elo1=10, alpha=0.05, beta=0.05):
+        """
+        Sequential probability ratio test of the Elo difference between two engines.
+
+        Games are played in pairs (same opening, colors swapped), whose
+        results are correlated, so the unit of the test is the pair: with
+        no draws in Hex it scores 0, 1/2 or 1 for engine A. The
+        log-likelihood ratio of H1 (elo1) against H0 (elo0) uses the
+        normal approximation of the generalized SPRT on the mean and
+        variance of the pair scores (as in the pentanomial model, which
+        has only three outcomes without draws). The test stops once it
+        leaves (lower, upper).
+
+        Parameters
+        ----------
+        elo0 : float
+            Elo difference of A over B under H0.
+        elo1 : float
+            Elo difference of A over B under H1 (larger than elo0).
+        alpha : float
+            Probability of accepting H1 although H0 is true.
+        beta : float
+            Probability of accepting H0 although H1 is true.
+
+        """
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self._score0, self._score1 = expected_score(elo0), expected_score(elo1)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.pairs = [0, 0, 0]  # number of pairs in which A won 0, 1 and 2 games
+
+    @property
+    def wins(self) -> int:
+        return self.pairs[1] + 2 * self.pairs[2]
+
+    @property
+    def losses(self) -> int:
+        return 2 * self.pairs[0] + self.pairs[1]
+
+    def add_pair(self, wins) -> None:
+        # Adds a finished pair in which engine A won wins (0, 1 or 2) games.
+        self.pairs[wins] += 1
+
+    def llr(self) -> float:
+        # Log-likelihood ratio of H1 against H0 of all pairs so far.
+        # Every outcome gets PAIR_PRIOR virtual pairs, so the variance is never 0
+        counts = [count + PAIR_PRIOR for count in self.pairs]
+        n = sum(counts)
+        mean = sum(count * score for count, score in zip(counts, PAIR_SCORES)) / n
+        variance = sum(count * (score - mean) ** 2 for count, score in zip(counts, PAIR_SCORES)) / n
+        return sum(self.pairs) * (self._score1 - self._score0) * (
+            2 * mean - self._score0 - self._score1) / (2 * variance)
+
+    def status(self):
+        # Accepted hypothesis (H0 or H1), None while the test goes on.
+        llr = self.llr()
+        if llr >= self.upper:
+            return H1
+        if llr <= self.lower:
+            return H0
+        return None
+
+
+def random_opening(dimension, rng, stones=2) -> np.ndarray:
+    # Board with stones random tiles, placed alternately by player 1 and 2 (player 1 to move for even stones).
+    board = np.zeros((dimension, dimension), dtype=int)
+    for k, idx in enumerate(rng.choice(dimension * dimension, size=stones, replace=False)):
+        board[divmod(int(idx), dimension)] = 1 + k % 2
+    return board
+
+
+def run_sprt(config_a, config_b, elo0=0, elo1=10, alpha=0.05, beta=0.05, dimension=11, max_pairs=10000,
+             workers=None, output=None, seed=0, verbose=True) -> SPRT:
+    """
+    Plays paired games between two engines until the SPRT decides.
+
+    Every opening (two random stones) is played twice, with engine A as
+    player 1 and as player 2, and the pair only enters the test when both
+    games are done. Games run in a process pool, as many at once as there
+    are workers. When the test decides, games not yet started are cancelled,
+    games already running are awaited; they are written to output (marked
+    with after_decision) but do not enter the test.
+
+    Parameters
+    ----------
+    config_a : tournament.PlayerConfig
+        Engine under test, e.g. the changed MinMaxPlayer.
+    config_b : tournament.PlayerConfig
+        Reference engine.
+    elo0, elo1, alpha, beta : float
+        Hypotheses and error probabilities, see SPRT.
+    dimension : int
+        Size of the board.
+    max_pairs : int
+        Maximum number of openings.
+    workers : int, optional
+        Number of worker processes (None: one per CPU).
+    output : file, optional
+        Text file that gets one JSON line per finished game (with the
+        pair, whether engine A won and whether the test had decided).
+    seed : int
+        Seed of openings and games.
+    verbose : bool
+        Whether to print the state of the test after every pair.
+
+    Returns
+    -------
+    sprt : SPRT
+        Test with all results, status() is None if max_pairs were played without decision.
+
+    """
+    sprt = SPRT(elo0, elo1, alpha, beta)
+    workers = workers or os.cpu_count()
+    rng = np.random.default_rng(seed)
+    start = time.time()
+    games = 0
+    pending = {}  # running game -> (pair, whether A is player 1)
+    pair_results = {}  # pair -> list of wins of A
+    next_pair = 0
+
+    def finish(future):
+        # Logs a finished game, returns its pair and whether A won.
+        nonlocal games
+        pair, a_first = pending.pop(future)
+        record = future.result()
+        a_won = record["winner"] == (1 if a_first else 2)
+        games += 1
+        record["pair"] = pair
+        record["engine_a_won"] = a_won
+        record["after_decision"] = sprt.status() is not None
+        if output is not None:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+        return pair, a_won
+
+    with ProcessPoolExecutor(workers) as pool:
+        while sprt.status() is None and (pending or next_pair < max_pairs):
+            # Keep every worker busy (two games per pair)
+            while next_pair < max_pairs and len(pending) < 2 * workers:
+                opening = random_opening(dimension, rng)
+                for a_first in (True, False):
+                    configs = (config_a, config_b) if a_first else (config_b, config_a)
+                    future = pool.submit(play_scheduled_game, *configs, opening, dimension, False,
+                                         seed + 2 * next_pair + (not a_first))
+                    pending[future] = (next_pair, a_first)
+                next_pair += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                decided = sprt.status() is not None
+                pair, a_won = finish(future)
+                if decided:
+                    continue
+                pair_results.setdefault(pair, []).append(a_won)
+                if len(pair_results[pair]) == 2:
+                    sprt.add_pair(sum(pair_results.pop(pair)))
+                    if verbose:
+                        print("pairs {:d}  W {:d}  L {:d}  LLR {:.2f} ({:.2f}, {:.2f})  {:.1f} games/min".format(
+                            sum(sprt.pairs), sprt.wins, sprt.losses, sprt.llr(), sprt.lower,
+                            sprt.upper, 60 * games / (time.time() - start)))
+
+        # Cancels the games not yet started and waits for the running ones (they cannot be interrupted)
+        pool.shutdown(cancel_futures=True)
+        for future in list(pending):
+            if not future.cancelled():
+                finish(future)
+
+    if verbose:
+        print("{} vs {}: {}".format(config_a.name, config_b.name, {
+            H1: "H1 accepted, at least {:g} Elo stronger".format(elo1),
+            H0: "H0 accepted, at most {:g} Elo stronger".format(elo0),
+            None: "no decision after {:d} pairs".format(max_pairs)}[sprt.status()]))
+    return sprt
+
+
+if __name__ == "__main__":
+    from ai_player import AIPlayer
+    from ai_player_improved_zobrist_2 import MinMaxPlayer
+    from tournament import PlayerConfig
+
+    dim = 7
+    run_sprt(PlayerConfig("MinMaxPlayer", MinMaxPlayer, dimension=dim, tt_size_mb=4, time_limit=0.1),
+             PlayerConfig("AIPlayer", AIPlayer),
+             elo0=0, elo1=50, dimension=dim)
@@ -0,0 +1,228 @@
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from elo import elo_ratings
+from game_runner import play_game
+
+ROUND_ROBIN = "round-robin"
+GAUNTLET = "gauntlet"
+
+
+class PlayerConfig:
+    def __init__(self, name, player_cls, **options):
+        """
+        Recipe for a player, so every game (in any worker process) gets a fresh one.
+
+        Parameters
+        ----------
+        name : str
+            Name of the player in results and tables.
+        player_cls : type
+            Player class, e.g. MinMaxPlayer (module-level, so it can be sent to worker processes).
+        options : dict
+            Keyword arguments of player_cls, e.g. dimension and time_limit
+            (a swap_fun must be a module-level function as well).
+
+        """
+        self.name = name
+        self.player_cls = player_cls
+        self.options = options
+
+    def create(self):
+        return self.player_cls(**self.options)
+
+
+def schedule(n_players, mode=ROUND_ROBIN, games=2, n_openings=1) -> list:
+    """
+    Games of a tournament.
+
+    Every pairing plays each opening games times with alternating colors,
+    so with an even number of games both players move first equally often.
+
+    Parameters
+    ----------
+    n_players : int
+        Number of players.
+    mode : str
+        ROUND_ROBIN (everybody against everybody) or GAUNTLET (player 0
+        against all others).
+    games : int
+        Games per pairing and opening.
+    n_openings : int
+        Number of start positions.
+
+    Returns
+    -------
+    games : list of tuples (int, int, int)
+        Per game: index of player 1, of player 2 and of the opening.
+
+    """
+    if mode == ROUND_ROBIN:
+        pairings = [(a, b) for a in range(n_players) for b in range(a + 1, n_players)]
+    elif mode == GAUNTLET:
+        pairings = [(0, b) for b in range(1, n_players)]
+    else:
+        raise ValueError("Unknown tournament mode: {}".format(mode))
+    return [(a, b, opening) if k % 2 == 0 else (b, a, opening)
+            for opening in range(n_openings) for a, b in pairings for k in range(games)]
+
+
+def play_scheduled_game(config1, config2, board, dimension, allow_swap, seed) -> dict:
+    """
+    Plays one game of a tournament (in a worker process) with new players.
+
+    Parameters
+    ----------
+    config1 : PlayerConfig
+        Player 1.
+    config2 : PlayerConfig
+        Player 2.
+    board : numpy array or None
+        Opening position (None: empty board).
+    dimension : int
+        Size of the empty board.
+    allow_swap : bool
+        Whether player 2 may claim the swap.
+    seed : int
+        Seed of the random number generators, so workers do not repeat each other's games.
+
+    Returns
+    -------
+    record : dict
+        Names of the players and GameResult.to_dict of the game.
+
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    player1, player2 = config1.create(), config2.create()
+    try:
+        result = play_game(player1, player2, board=board, dimension=dimension, allow_swap=allow_swap)
+    finally:
+        player1.close()
+        player2.close()
+    record = {"player1": config1.name, "player2": config2.name}
+    record.update(result.to_dict())
+    return record
+
+
+class Tournament:
+    def __init__(self, configs, mode=ROUND_ROBIN, games=2, dimension=11, openings=None, allow_swap=True,
+                 seed=0):
+        """
+        Tournament between player configurations, played in a process pool.
+
+        Parameters
+        ----------
+        configs : list of PlayerConfig
+            Participants.
+        mode : str
+            ROUND_ROBIN or GAUNTLET (configs[0] against all others).
+        games : int
+            Games per pairing and opening (colors alternate).
+        dimension : int
+            Size of the board.
+        openings : list of numpy arrays, optional
+            Start positions, each played by every pairing (None: empty board).
+        allow_swap : bool
+            Whether player 2 may claim the swap at the second turn.
+        seed : int
+            Seed of the games, game k is played with seed + k.
+
+        """
+        self.configs = configs
+        self.dimension = dimension
+        self.openings = openings if openings is not None else [None]
+        self.allow_swap = allow_swap
+        self.seed = seed
+        self.games = schedule(len(configs), mode, games, len(self.openings))
+        self.wins = np.zeros((len(configs), len(configs)), dtype=int)
+        self.records = []
+
+    def run(self, workers=None, output=None, verbose=True) -> list:
+        """
+        Plays all games, as many at once as there are workers.
+
+        Parameters
+        ----------
+        workers : int, optional
+            Number of worker processes (None: one per CPU).
+        output : file, optional
+            Text file that gets one JSON line per finished game.
+        verbose : bool
+            Whether to print every result and the standings (Elo with 95%
+            confidence interval) after every game.
+
+        Returns
+        -------
+        records : list of dicts
+            Finished games in order of completion (see play_scheduled_game),
+            with the index of the game in the schedule.
+
+        """
+        names = [config.name for config in self.configs]
+        start = time.time()
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(play_scheduled_game, self.configs[first], self.configs[second],
+                                   self.openings[opening], self.dimension, self.allow_swap, self.seed + k): k
+                       for k, (first, second, opening) in enumerate(self.games)}
+            for future in as_completed(futures):
+                k = futures[future]
+                record = future.result()
+                record["game"] = k
+                record["opening"] = self.games[k][2]
+                first, second, _ = self.games[k]
+                winner, loser = (first, second) if record["winner"] == 1 else (second, first)
+                self.wins[winner, loser] += 1
+                self.records.append(record)
+
+                if output is not None:
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+                if verbose:
+                    print("Game {:d}/{:d} ({:.1f} games/min): {} beats {}".format(
+                        len(self.records), len(self.games), 60 * len(self.records) / (time.time() - start),
+                        names[winner], names[loser]))
+                    self.print_standings()
+        return self.records
+
+    def ratings(self) -> tuple:
+        # Elo ratings (mean 0) and 95% confidence half-widths of all players, see elo.elo_ratings.
+        return elo_ratings(self.wins)
+
+    def print_standings(self) -> None:
+        # Prints players sorted by rating with their results.
+        ratings, errors = self.ratings()
+        print("{:20s}{:>8s}{:>8s}{:>8s}{:>8s}".format("player", "Elo", "+/-", "won", "games"))
+        for idx in np.argsort(-ratings):
+            print("{:20s}{:>8.0f}{:>8.0f}{:>8d}{:>8d}".format(
+                self.configs[idx].name, ratings[idx], errors[idx], self.wins[idx].sum(),
+                self.wins[idx].sum() + self.wins[:, idx].sum()))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ai_player import AIPlayer
+    from ai_player_improved_zobrist_2 import MinMaxPlayer
+    from random_player import RandomPlayer
+
+    parser = argparse.ArgumentParser(description="Hex engine tournament")
+    parser.add_argument("--output", help="write one JSON line per finished game to this file")
+    args = parser.parse_args()
+
+    dim = 7
+    configs = [
+        PlayerConfig("MinMaxPlayer", MinMaxPlayer, dimension=dim, tt_size_mb=4, time_limit=0.2),
+        PlayerConfig("AIPlayer", AIPlayer),
+        PlayerConfig("RandomPlayer", RandomPlayer, think_time=0),
+    ]
+    tournament = Tournament(configs, games=10, dimension=dim)
+    if args.output:
+        with open(args.output, "w") as output:
+            tournament.run(output=output)
+    else:
+        tournament.run()
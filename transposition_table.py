@@ -0,0 +1,276 @@
+import struct
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Bound types of stored scores
+EXACT = 0
+LOWER_BOUND = 1  # score is at least the stored value (search failed high)
+UPPER_BOUND = 2  # score is at most the stored value (search failed low)
+
+ENTRY_BYTES = 16  # one 64-bit key word and one 64-bit data word
+
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        """
+        Fixed-size transposition table for alpha-beta search.
+
+        The table is one preallocated array, so its memory footprint stays
+        the same no matter how many positions are searched. Entries are
+        grouped in buckets of two: the first slot is depth-preferred (only
+        replaced by a search at least as deep or by a newer search), the
+        second slot is always replaced.
+
+        Parameters
+        ----------
+        size_mb : float
+            Memory used by the table in MB.
+
+        """
+        n_entries = max(2, int(size_mb * 2 ** 20) // ENTRY_BYTES)
+        n_buckets = 1 << ((n_entries // 2).bit_length() - 1)  # power of two, so index is key & mask
+        self._mask = n_buckets - 1
+        self._table = self._allocate(2 * n_buckets)
+        self.generation = 1
+        self.reset_stats()
+        self._used = 0
+
+    def _allocate(self, n_entries) -> np.ndarray:
+        # Rows are entries, columns are (key, data).
+        return np.zeros((n_entries, 2), dtype=np.uint64)
+
+    @property
+    def capacity(self) -> int:
+        return self._table.shape[0]
+
+    @property
+    def size_mb(self) -> float:
+        return self._table.nbytes / 2 ** 20
+
+    def new_search(self) -> None:
+        # Marks all stored entries as old, so depth-preferred slots can be reused by the next search.
+        self.generation = self.generation % 63 + 1
+
+    def clear(self) -> None:
+        self._table[:] = 0
+        self._used = 0
+
+    def close(self) -> None:
+        # Frees resources held outside of the process memory (none for this table).
+        pass
+
+    def reset_stats(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    def probe(self, key):
+        """
+        Looks up a position.
+
+        Parameters
+        ----------
+        key : int
+            64-bit hash of the position.
+
+        Returns
+        -------
+        entry : tuple (score, depth, flag, move) or None
+            Stored entry, None if the position is not in the table.
+
+        """
+        self.probes += 1
+        slot = (key & self._mask) << 1
+        for pos in (slot, slot + 1):
+            data = self._read(pos, key)
+            if data is not None:
+                self.hits += 1
+                return _unpack(data)
+        return None
+
+    def store(self, key, depth, score, flag, move=NO_MOVE) -> None:
+        """
+        Stores result of a search.
+
+        Parameters
+        ----------
+        key : int
+            64-bit hash of the position.
+        depth : int
+            Remaining search depth the score was computed with.
+        score : float
+            Score of the position.
+        flag : int
+            EXACT, LOWER_BOUND or UPPER_BOUND.
+        move : int
+            Best move found (encoded by the caller as non-negative int), NO_MOVE if none.
+
+        """
+        self.stores += 1
+        slot = (key & self._mask) << 1
+        data = _pack(score, depth, flag, move, self.generation)
+
+        old_key, old_data = self._entry(slot)
+        if old_data and old_key != key:
+            old_depth, old_generation = _depth_and_generation(old_data)
+            if old_generation == self.generation and depth < old_depth:
+                # Depth-preferred slot keeps the deeper result, use the always-replace slot
+                slot += 1
+                old_key, old_data = self._entry(slot)
+
+        if not old_data:
+            self._used += 1
+        elif old_key != key:
+            self.collisions += 1
+        self._write(slot, key, data)
+
+    def counts(self) -> dict:
+        # Counters since the last reset_stats.
+        return {"probes": self.probes, "hits": self.hits, "stores": self.stores, "collisions": self.collisions}
+
+    def add_counts(self, counts) -> None:
+        # Adds counters of another user of the same table, e.g. of a worker process (see counts).
+        self.probes += counts["probes"]
+        self.hits += counts["hits"]
+        self.stores += counts["stores"]
+        self.collisions += counts["collisions"]
+
+    def stats(self) -> dict:
+        # Returns usage statistics of the table.
+        return {
+            "size_mb": self.size_mb,
+            "capacity": self.capacity,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "stores": self.stores,
+            "collisions": self.collisions,
+            "fill": self._used / self.capacity,
+        }
+
+    # "Private" methods
+    def _entry(self, pos) -> tuple:
+        return int(self._table[pos, 0]), int(self._table[pos, 1])
+
+    def _read(self, pos, key):
+        stored_key, data = self._entry(pos)
+        if data and stored_key == key:
+            return data
+        return None
+
+    def _write(self, pos, key, data) -> None:
+        self._table[pos, 0] = key
+        self._table[pos, 1] = data
+
+
+class SharedTranspositionTable(TranspositionTable):
+    def __init__(self, size_mb=16):
+        """
+        Transposition table in shared memory, for all search processes of one player.
+
+        Workers get the table as argument when they are started (attached
+        by name if the table is pickled) and probe and store concurrently
+        without locks, so the memory used stays the same for any number of
+        workers. The key column holds key XOR data: an entry torn by two
+        processes writing at once no longer matches its key and is read
+        as a miss.
+
+        The generation is kept in shared memory as well, so all processes
+        age entries alike; only the process that owns the search should
+        call new_search. Probes, hits, stores and collisions are counted by
+        each process, the owner adds those of the workers with add_counts.
+
+        The process that created the table frees the shared memory with
+        close, or at the latest when the table is garbage collected or the
+        process exits.
+
+        Parameters
+        ----------
+        size_mb : float
+            Memory used by the table in MB.
+
+        """
+        self._shm = None
+        super().__init__(size_mb)
+
+    def _allocate(self, n_entries) -> np.ndarray:
+        # New shared memory is zero-filled, i.e. all entries are empty. The generation follows the entries.
+        self._shm = shared_memory.SharedMemory(create=True, size=n_entries * ENTRY_BYTES + 8)
+        self._unlink = weakref.finalize(self, self._shm.unlink)
+        self._generation = np.ndarray(1, dtype=np.uint64, buffer=self._shm.buf, offset=n_entries * ENTRY_BYTES)
+        return np.ndarray((n_entries, 2), dtype=np.uint64, buffer=self._shm.buf)
+
+    @property
+    def generation(self) -> int:
+        return int(self._generation[0])
+
+    @generation.setter
+    def generation(self, value) -> None:
+        self._generation[0] = value
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_shm"] = self._shm.name
+        state["_table"] = self._table.shape
+        del state["_generation"]
+        state["_unlink"] = None  # only the creating process frees the memory
+        return state
+
+    def __setstate__(self, state) -> None:
+        # Attaches to the table of the creating process
+        self.__dict__.update(state)
+        # (worker processes share the resource tracker of their parent, so the memory is still freed once)
+        self._shm = shared_memory.SharedMemory(name=state["_shm"])
+        self._table = np.ndarray(state["_table"], dtype=np.uint64, buffer=self._shm.buf)
+        self._generation = np.ndarray(1, dtype=np.uint64, buffer=self._shm.buf, offset=self._table.nbytes)
+
+    def close(self) -> None:
+        # Detaches from the shared memory, which is freed if this process created it.
+        # The table cannot be used afterwards.
+        if self._shm is None:
+            return
+        del self._table, self._generation  # views of the memory must be gone before it is closed
+        self._shm.close()
+        self._shm = None
+        if self._unlink is not None:
+            self._unlink()
+
+    def stats(self) -> dict:
+        # Fill is counted in the table, since entries are stored by several processes.
+        stats = super().stats()
+        stats["fill"] = np.count_nonzero(self._table[:, 1]) / self.capacity
+        return stats
+
+    def _entry(self, pos) -> tuple:
+        check, data = int(self._table[pos, 0]), int(self._table[pos, 1])
+        return check ^ data, data
+
+    def _write(self, pos, key, data) -> None:
+        self._table[pos, 0] = key ^ data
+        self._table[pos, 1] = data
+
+
+# Layout of the data word (from lowest bit):
+#   32 bits score (float32), 8 bits depth, 2 bits flag + 1 (so used entries are never 0),
+#   6 bits generation, 16 bits move + 1
+def _pack(score, depth, flag, move, generation) -> int:
+    score_bits = int.from_bytes(struct.pack("<f", score), "little")
+    return (score_bits | min(depth, 255) << 32 | (flag + 1) << 40 | generation << 42
+            | (move + 1) << 48)
+
+
+def _unpack(data) -> tuple:
+    score = struct.unpack("<f", (data & 0xFFFFFFFF).to_bytes(4, "little"))[0]
+    depth = (data >> 32) & 0xFF
+    flag = ((data >> 40) & 0x3) - 1
+    move = (data >> 48) - 1
+    return score, depth, flag, move
+
+
+def _depth_and_generation(data) -> tuple:
+    return (data >> 32) & 0xFF, (data >> 42) & 0x3F
@@ -0,0 +1,62 @@
+class UnionFind:
+    def __init__(self, size):
+        """
+        Disjoint-set forest over the elements 0, ..., size - 1 whose unions can be undone.
+
+        Uses union by size without path compression, so every union only
+        changes two entries and can be rolled back exactly. Finds need
+        O(log n) steps.
+
+        Parameters
+        ----------
+        size : int
+            Number of elements.
+
+        """
+        self.parent = list(range(size))
+        self.size = [1] * size
+        self._history = []
+
+    def find(self, x) -> int:
+        # Returns representative of the set containing x.
+        parent = self.parent
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    def union(self, x, y) -> bool:
+        # Merges sets of x and y. Returns True if they were not already in the same set.
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return False
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        self._history.append(y)
+        return True
+
+    def connected(self, x, y) -> bool:
+        return self.find(x) == self.find(y)
+
+    def mark(self) -> int:
+        # Returns marker of the current state which can be passed to rollback.
+        return len(self._history)
+
+    def rollback(self, mark) -> None:
+        # Undoes all unions made since mark was taken.
+        history = self._history
+        while len(history) > mark:
+            y = history.pop()
+            x = self.parent[y]
+            self.parent[y] = y
+            self.size[x] -= self.size[y]
+
+    def copy(self):
+        # Returns independent copy of the current state (without history).
+        other = UnionFind.__new__(UnionFind)
+        other.parent = list(self.parent)
+        other.size = list(self.size)
+        other._history = []
+        return other